@@ -2,6 +2,9 @@
 ASGI config for it_support_system project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn it_support_system.asgi:application``)
+to enable the Server-Sent Events chat stream at /api/chat-stream/ and the async
+versions of the dashboard, ticket, analytics and chat history views.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +15,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'it_support_system.settings')
+os.environ.setdefault('TICKETS_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
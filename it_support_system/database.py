@@ -0,0 +1,98 @@
+"""
+Database configuration.
+
+PostgreSQL (DATABASE_URL set, as on Render) uses psycopg 3's connection pool.
+Each worker keeps a few connections open, and a pooled connection is checked
+before it is handed out, so one dropped by the server or a proxy is replaced
+instead of failing the request. Without psycopg_pool installed, persistent
+connections with Django's health checks are used instead.
+
+Under gevent workers (the Procfile and render.yaml) Django opens a connection
+per greenlet, so persistent connections would pile up until Postgres runs out
+of slots. The pool is required there: it caps the connections per worker, and
+psycopg 3 waits for the server cooperatively under gevent's monkey patching.
+
+The SQLite fallback is tuned so that concurrent workers do not fail with
+"database is locked":
+
+* WAL journal mode lets readers carry on while one connection writes.
+* Transactions begin IMMEDIATE, taking the write lock up front. A deferred
+  transaction that later needs to write cannot wait for the lock, so it fails.
+* A busy timeout makes writers queue for the lock instead of failing at once.
+* synchronous=NORMAL (safe with WAL) and memory-mapped reads cut I/O.
+"""
+
+import importlib.util
+import os
+import sys
+
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+SQLITE_TIMEOUT = 20  # seconds a connection waits for the write lock
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=134217728',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+)
+
+
+def pool_available():
+    return importlib.util.find_spec('psycopg') is not None and importlib.util.find_spec('psycopg_pool') is not None
+
+
+def gevent_patched():
+    """
+    Whether this process runs under gevent's monkey patching, as gunicorn's gevent workers do
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('socket')
+
+
+def postgres_database(url):
+    config = dj_database_url.parse(url, ssl_require=True, conn_health_checks=True)
+    if gevent_patched() and not pool_available():
+        raise ImproperlyConfigured(
+            'gevent workers need psycopg 3 with psycopg_pool (pip install "psycopg[binary,pool]"); '
+            'without the pool every greenlet keeps its own PostgreSQL connection'
+        )
+    if pool_available():
+        from psycopg_pool import ConnectionPool
+
+        # The pool owns the connections, so Django must not keep its own
+        config['CONN_MAX_AGE'] = 0
+        config.setdefault('OPTIONS', {})['pool'] = {
+            # Django's health checks do nothing without CONN_MAX_AGE; the pool checks instead
+            'check': ConnectionPool.check_connection,
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),  # seconds to wait for a free connection
+            'max_idle': 300,  # seconds before an idle connection above min_size is closed
+        }
+    else:
+        config['CONN_MAX_AGE'] = 600
+    return config
+
+
+def sqlite_database(path):
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {
+            'timeout': SQLITE_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+        },
+    }
+
+
+def default_database(base_dir):
+    """
+    The 'default' database: PostgreSQL from DATABASE_URL, otherwise SQLite in ``base_dir``
+    """
+    url = os.environ.get('DATABASE_URL')
+    if url:
+        return postgres_database(url)
+    return sqlite_database(base_dir / 'db.sqlite3')
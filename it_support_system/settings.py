@@ -12,7 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-import dj_database_url
+
+from .database import default_database
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,6 +52,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'tickets.middleware.PresenceMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -63,12 +65,21 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tickets.context_processors.chat_unread',
+                'tickets.context_processors.fragment_cache',
+            ],
+            # Compiled templates are kept in memory for the life of the worker.
+            # runserver's autoreloader clears them when a template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -80,22 +91,87 @@ WSGI_APPLICATION = 'it_support_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-# Use PostgreSQL for production (Render), SQLite for development
-if os.environ.get('DATABASE_URL'):
-    DATABASES = {
-        'default': dj_database_url.config(
-            conn_max_age=600,
-            ssl_require=True
-        )
+# Use PostgreSQL for production (Render), SQLite for development; pooling and
+# SQLite tuning live in it_support_system/database.py
+DATABASES = {
+    'default': default_database(BASE_DIR),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Two tiers: a small LRU cache in each worker in front of a shared cache. The
+# shared tier is Redis when REDIS_URL is set, a database table when
+# CACHE_DB_TABLE is set (run createcachetable), and files under CACHE_DIR otherwise.
+# Sessions, profiles, presence, unread counts and template fragments all live in
+# the shared tier, a handful of entries per active user. The file and database
+# backends default to 300 entries and drop a third of them when full, so they
+# are sized here (CACHE_MAX_ENTRIES) and only drop a tenth at a time. The file
+# backend lists its directory on every write, so it gets the smaller default.
+if os.environ.get('REDIS_URL'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+    }
+elif os.environ.get('CACHE_DB_TABLE'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.environ.get('CACHE_DB_TABLE'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 200000)),
+            'CULL_FREQUENCY': 10,
+        },
     }
 else:
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
-        }
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / 'var' / 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 20000)),
+            'CULL_FREQUENCY': 10,
+        },
     }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'tickets.cache_backends.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,  # seconds; how stale another worker's change can look
+        },
+    },
+    'shared': SHARED_CACHE,
+}
+
+CACHE_TIMEOUTS = {  # seconds, per tickets.caching namespace
+    'dashboard': 60,
+    'analytics': 300,
+    'calendar': 300,
+    'staff': 3600,
+}
+CACHE_STATS_FLUSH_INTERVAL = 60  # seconds between hit/miss counter writes per worker
+
+# {% cache %} fragments in the dashboard, ticket and analytics templates.
+# The release is part of every fragment key, so a deploy never serves
+# fragments rendered by the previous templates. Off by default under DEBUG,
+# where templates are being edited.
+TEMPLATE_FRAGMENT_TIMEOUT = int(os.environ.get('TEMPLATE_FRAGMENT_TIMEOUT', 0 if DEBUG else 300))  # seconds
+TEMPLATE_FRAGMENT_RELEASE = os.environ.get('RENDER_GIT_COMMIT', 'dev')[:12]
+
+
+# Sessions are read from the shared cache tier (not the per-worker one, so a logout
+# is seen by every worker at once); changes reach the database in batches
+SESSION_ENGINE = 'tickets.session_store'
+SESSION_CACHE_ALIAS = 'shared'
+SESSION_WRITE_BEHIND_INTERVAL = 30  # seconds a session change may wait before it is written to the database
+
+
+# Loads the profile with the user on every request; the profile is cached between requests
+AUTHENTICATION_BACKENDS = ['tickets.backends.ProfileModelBackend']
+PROFILE_CACHE_TIMEOUT = 300  # seconds
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -150,6 +226,42 @@ if not DEBUG:
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Attachment uploads. Plain form uploads are buffered by Django, so large files go
+# through the chunked upload API which streams each chunk to CHUNKED_UPLOAD_DIR.
+ATTACHMENT_MAX_SIZE = 10 * 1024 * 1024  # bytes, single-request form uploads
+CHUNKED_UPLOAD_MAX_SIZE = 1024 * 1024 * 1024  # bytes, chunked uploads
+CHUNKED_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # bytes, suggested to clients
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', BASE_DIR / 'var' / 'uploads')
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24  # unfinished sessions removed by cleanup_upload_sessions
+ATTACHMENT_INGEST_WORKERS = 4  # threads writing files submitted with a new ticket
+
+# Attachment storage quotas in bytes, checked against StorageUsage counters before
+# an upload is accepted. None means unlimited.
+ATTACHMENT_STORAGE_QUOTAS = {
+    'ticket': 2 * 1024 * 1024 * 1024,
+    'user': 10 * 1024 * 1024 * 1024,
+    'department': 100 * 1024 * 1024 * 1024,
+}
+
+# Attachment downloads are permission-checked by Django. Set the backend to
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache) so the front server sends
+# the bytes; otherwise FileResponse streams them, using sendfile() where possible.
+ATTACHMENT_SENDFILE_BACKEND = os.environ.get('ATTACHMENT_SENDFILE_BACKEND', '')
+ATTACHMENT_ACCEL_REDIRECT_PREFIX = '/protected-media/'  # internal nginx location aliased to MEDIA_ROOT
+
+# WebP previews for image attachments, rendered in a pool of worker processes
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))  # 0 renders in the web worker
+ATTACHMENT_PREVIEW_SIZES = {'thumb': 160, 'preview': 1024}  # longest edge in pixels
+
+# Blobs used only by tickets resolved or closed more than ATTACHMENT_COLD_AFTER_DAYS
+# ago are gzipped into this storage by tier_attachments. Any Django storage backend
+# works, e.g. an S3 bucket via django-storages.
+ATTACHMENT_COLD_STORAGE = {
+    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    'OPTIONS': {'location': os.environ.get('ATTACHMENT_COLD_ROOT', BASE_DIR / 'var' / 'cold_attachments')},
+}
+ATTACHMENT_COLD_AFTER_DAYS = 90
+
 # Email configuration for notifications
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -165,6 +277,26 @@ PRIMARY_ESCALATION_EMAIL = os.environ.get('PRIMARY_ESCALATION_EMAIL', 'johnjaymo
 # Email settings for HTML emails
 EMAIL_USE_HTML = True
 
+# Chat push transport (Server-Sent Events, served by the ASGI entry point)
+CHAT_BROKER_BACKEND = os.environ.get('CHAT_BROKER_BACKEND', 'tickets.chat_events.InProcessBroker')
+CHAT_STREAM_KEEPALIVE = 20  # seconds between keepalive comments on idle streams
+CHAT_HISTORY_PAGE_SIZE = 50  # messages returned when a conversation is opened
+CHAT_HISTORY_MAX_PAGE_SIZE = 200
+CHAT_ARCHIVE_AFTER_DAYS = 180  # default retention window for archive_chat_messages
+
+# Async dashboard, ticket, analytics and chat history views; asgi.py turns them on
+TICKETS_ASYNC_VIEWS = os.environ.get('TICKETS_ASYNC_VIEWS', 'False') == 'True'
+
+# Long-polling fallback for WSGI workers, woken through per-user signal files
+CHAT_SIGNAL_DIR = os.environ.get('CHAT_SIGNAL_DIR', BASE_DIR / 'var' / 'chat_signals')
+CHAT_LONG_POLL_TIMEOUT = 25  # seconds a wait request is held before returning empty
+CHAT_LONG_POLL_INTERVAL = 0.5  # seconds between signal checks
+
+# Presence heartbeats, kept in the cache and flushed to UserProfile.last_seen in batches
+PRESENCE_TIMEOUT = 120  # seconds without a request before a user shows as offline
+PRESENCE_HEARTBEAT_INTERVAL = 30  # minimum seconds between cache writes per user and worker
+PRESENCE_FLUSH_INTERVAL = 60  # seconds between last_seen batch writes
+
 # Login/Logout URLs
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'tickets:dashboard'
@@ -1,67 +1,304 @@
 #!/usr/bin/env python
 """
-Run Django development server with HTTPS support
+Run Django server with HTTPS support
+
+    python run_https.py                          # 8 threads in one process
+    python run_https.py --mode prefork --workers 4 --threads 8
+    python run_https.py --loadtest --concurrency 50 --requests 2000
+
+Connections are handed to a fixed pool of threads per process, so one slow
+request (a PDF export, say) no longer blocks everyone else. Connections are
+kept alive between requests for --keep-alive seconds. The TLS context is
+created once, before workers are forked, so every worker shares its session
+ticket keys and a client can resume its TLS session on any worker without a
+full handshake.
+
+The self-signed certificate is saved next to this script and reused until it
+is about to expire, so startup does not wait for a new key.
 """
 
+import argparse
+import http.client
 import os
+import signal
+import ssl
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
 import django
-from django.core.management import execute_from_command_line
-from django.core.servers.basehttp import WSGIServer
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
 from django.core.wsgi import get_wsgi_application
-import ssl
 
-def run_https_server():
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CERT_FILE = os.path.join(BASE_DIR, 'localhost.pem')
+KEY_FILE = os.path.join(BASE_DIR, 'localhost-key.pem')
+RENEW_BEFORE = timedelta(days=30)  # replace the certificate this long before it expires
+
+
+class PooledWSGIServer(ThreadedWSGIServer):
+    """Threaded WSGIServer that serves connections from a fixed pool of threads"""
+
+    def __init__(self, *args, threads=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = threads
+        self.pool = None
+
+    def serve_forever(self, poll_interval=0.5):
+        # The pool is created here rather than in __init__ so that forked workers each start their own
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='https') as self.pool:
+            super().serve_forever(poll_interval)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def handle_error(self, request, client_address):
+        # Clients that reject the self-signed certificate or go idle are not errors
+        if isinstance(sys.exc_info()[1], (ssl.SSLError, TimeoutError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """WSGIRequestHandler that closes idle keep-alive connections after ``timeout`` seconds"""
+
+    timeout = 5
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def certificate_is_current(cert_file, key_file):
+    """Whether the saved certificate exists and does not expire within RENEW_BEFORE"""
+    if not (os.path.exists(cert_file) and os.path.exists(key_file)):
+        return False
+    try:
+        from cryptography import x509
+    except ImportError:
+        # Can't read the expiry date; keep using the certificate
+        return True
+    with open(cert_file, 'rb') as f:
+        cert = x509.load_pem_x509_certificate(f.read())
+    return cert.not_valid_after_utc - datetime.now(timezone.utc) > RENEW_BEFORE
+
+
+def create_ssl_context(cert_file, key_file):
+    """TLS context shared by every worker"""
+    if not certificate_is_current(cert_file, key_file):
+        print("Creating self-signed certificate for development...")
+        create_self_signed_cert(cert_file, key_file)
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.load_cert_chain(cert_file, key_file)
+    context.set_alpn_protocols(['http/1.1'])
+    # Session tickets let returning clients skip the full handshake (TLS 1.3 sends them after each handshake)
+    context.num_tickets = 2
+    return context
+
+
+def create_server(args, context):
+    """Bind the listening socket, wrapped with TLS"""
+    KeepAliveRequestHandler.timeout = args.keep_alive
+    KeepAliveRequestHandler.quiet = args.quiet
+    server = PooledWSGIServer(
+        (args.host, args.port), KeepAliveRequestHandler, threads=args.threads,
+    )
+    server.set_app(get_wsgi_application())
+    # The handshake then happens on the worker thread's first read, not in the accept loop
+    server.socket = context.wrap_socket(server.socket, server_side=True, do_handshake_on_connect=False)
+    return server
+
+
+def serve_prefork(server, workers):
+    """Fork ``workers`` processes serving the shared socket and replace any that exit"""
+    from django.db import connections
+
+    # Children must not share the parent's database connections
+    connections.close_all()
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}, starting a new one")
+            time.sleep(1)
+            spawn()
+    server.server_close()
+
+
+def run_https_server(args):
     """Run Django server with HTTPS"""
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'it_support_system.settings')
     django.setup()
-    
-    # Get WSGI application
-    application = get_wsgi_application()
-    
-    # Create server
-    server = WSGIServer(('localhost', 8000), application)
-    
-    # Create SSL context
-    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-    
-    # For development, we'll create a self-signed certificate
-    # In production, use proper certificates
-    try:
-        # Try to load existing certificate
-        context.load_cert_chain('localhost.pem', 'localhost-key.pem')
-    except FileNotFoundError:
-        print("Creating self-signed certificate for development...")
-        create_self_signed_cert()
-        context.load_cert_chain('localhost.pem', 'localhost-key.pem')
-    
-    # Wrap socket with SSL
-    server.socket = context.wrap_socket(server.socket, server_side=True)
-    
-    print("Starting HTTPS development server at https://localhost:8000/")
+
+    context = create_ssl_context(args.cert, args.key)
+    server = create_server(args, context)
+
+    if args.mode == 'prefork' and not hasattr(os, 'fork'):
+        print("Pre-forked workers need os.fork(); serving with threads in one process instead")
+        args.mode = 'threaded'
+    workers = args.workers if args.mode == 'prefork' else 1
+
+    print(f"Starting HTTPS development server at https://{args.host}:{args.port}/")
+    print(f"{workers} worker process(es) x {args.threads} threads, keep-alive {args.keep_alive}s")
     print("Note: You may see a security warning in your browser. Click 'Advanced' and 'Proceed to localhost'")
-    
+
+    if args.mode == 'prefork':
+        serve_prefork(server, workers)
+        return
+
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\nShutting down server...")
-        server.shutdown()
+    finally:
+        server.server_close()
+
+
+class ResumingHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPSConnection that offers a saved TLS session, so the server can resume it"""
+
+    def __init__(self, host, port, tls_context, tls_session=None, **kwargs):
+        super().__init__(host, port, context=tls_context, **kwargs)
+        self.tls_context = tls_context
+        self.tls_session = tls_session
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        self.sock = self.tls_context.wrap_socket(self.sock, server_hostname=self.host, session=self.tls_session)
+
+
+def run_loadtest(args):
+    """Send ``args.requests`` HTTPS requests from ``args.concurrency`` clients and report the results"""
+    url = urlsplit(args.url or f'https://{args.host}:{args.port}/login/')
+    path = url.path or '/'
+    if url.query:
+        path += '?' + url.query
+
+    # Load testing our own self-signed server, so the certificate is not verified
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
 
-def create_self_signed_cert():
+    lock = threading.Lock()
+    totals = {'sent': 0, 'ok': 0, 'errors': 0, 'connections': 0, 'resumed': 0}
+    latencies = []
+
+    def take_request():
+        with lock:
+            if totals['sent'] >= args.requests:
+                return False
+            totals['sent'] += 1
+            return True
+
+    def client():
+        conn = None
+        session = None
+        timings = []
+        ok = errors = connections = resumed = 0
+        while take_request():
+            started = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = ResumingHTTPSConnection(url.hostname, url.port or 443, context, session, timeout=30)
+                    conn.connect()
+                    connections += 1
+                    resumed += conn.sock.session_reused
+                headers = {} if args.keep_alive_client else {'Connection': 'close'}
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                session = conn.sock.session if conn.sock else session
+                if response.will_close or not args.keep_alive_client:
+                    conn.close()
+                    conn = None
+                if response.status < 500:
+                    ok += 1
+                else:
+                    errors += 1
+                timings.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                if conn is not None:
+                    conn.close()
+                conn = None
+        if conn is not None:
+            conn.close()
+        with lock:
+            totals['ok'] += ok
+            totals['errors'] += errors
+            totals['connections'] += connections
+            totals['resumed'] += resumed
+            latencies.extend(timings)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0
+
+    print(f"{totals['ok']} ok, {totals['errors']} errors in {elapsed:.1f}s ({totals['ok'] / elapsed:.0f} requests/s)")
+    print(f"latency p50 {percentile(0.5):.1f} ms, p95 {percentile(0.95):.1f} ms, p99 {percentile(0.99):.1f} ms")
+    print(f"{totals['connections']} TLS connections, {totals['resumed']} resumed sessions")
+
+
+def create_self_signed_cert(cert_file=CERT_FILE, key_file=KEY_FILE):
     """Create a self-signed certificate for development"""
     from cryptography import x509
     from cryptography.x509.oid import NameOID
     from cryptography.hazmat.primitives import hashes, serialization
     from cryptography.hazmat.primitives.asymmetric import rsa
-    from datetime import datetime, timedelta
     import ipaddress
-    
+
     # Generate private key
     private_key = rsa.generate_private_key(
         public_exponent=65537,
         key_size=2048,
     )
-    
+
     # Create certificate
     subject = issuer = x509.Name([
         x509.NameAttribute(NameOID.COUNTRY_NAME, "US"),
@@ -70,7 +307,8 @@ def create_self_signed_cert():
         x509.NameAttribute(NameOID.ORGANIZATION_NAME, "IT Support System"),
         x509.NameAttribute(NameOID.COMMON_NAME, "localhost"),
     ])
-    
+
+    now = datetime.now(timezone.utc)
     cert = x509.CertificateBuilder().subject_name(
         subject
     ).issuer_name(
@@ -80,9 +318,9 @@ def create_self_signed_cert():
     ).serial_number(
         x509.random_serial_number()
     ).not_valid_before(
-        datetime.utcnow()
+        now
     ).not_valid_after(
-        datetime.utcnow() + timedelta(days=365)
+        now + timedelta(days=365)
     ).add_extension(
         x509.SubjectAlternativeName([
             x509.DNSName("localhost"),
@@ -90,21 +328,51 @@ def create_self_signed_cert():
         ]),
         critical=False,
     ).sign(private_key, hashes.SHA256())
-    
-    # Write certificate and key to files
-    with open("localhost.pem", "wb") as f:
+
+    # Write certificate and key to files; the key is readable by the owner only
+    with open(cert_file, "wb") as f:
         f.write(cert.public_bytes(serialization.Encoding.PEM))
-    
-    with open("localhost-key.pem", "wb") as f:
+
+    with open(os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
         f.write(private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PrivateFormat.PKCS8,
             encryption_algorithm=serialization.NoEncryption()
         ))
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the project over HTTPS, or load-test a running HTTPS server')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--mode', choices=['threaded', 'prefork'], default='threaded',
+                        help='threaded: one process; prefork: --workers processes sharing the socket')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='Worker processes in prefork mode')
+    parser.add_argument('--threads', type=int, default=8, help='Request threads per worker process')
+    parser.add_argument('--keep-alive', type=float, default=5,
+                        help='Seconds an idle keep-alive connection is held open')
+    parser.add_argument('--cert', default=CERT_FILE, help='Certificate file, created if missing or expiring')
+    parser.add_argument('--key', default=KEY_FILE, help='Private key file')
+    parser.add_argument('--quiet', action='store_true', help='Do not log each request')
+
+    loadtest = parser.add_argument_group('load test')
+    loadtest.add_argument('--loadtest', action='store_true', help='Load-test a running server instead of serving')
+    loadtest.add_argument('--url', help='URL to request (default: the login page on --host/--port)')
+    loadtest.add_argument('--requests', type=int, default=1000)
+    loadtest.add_argument('--concurrency', type=int, default=20)
+    loadtest.add_argument('--no-keep-alive', dest='keep_alive_client', action='store_false',
+                          help='Open a new connection for every request')
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
+    args = parse_args()
+    if args.loadtest:
+        run_loadtest(args)
+        sys.exit(0)
     try:
-        run_https_server()
+        run_https_server(args)
     except ImportError:
         print("Error: cryptography package not found.")
         print("Install it with: pip install cryptography")
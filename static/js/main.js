@@ -25,6 +25,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // File upload drag and drop
     initializeFileUpload();
     
+    // Resumable chunked attachment uploads
+    initializeChunkedUpload();
+    
     // Chat functionality
     initializeChat();
     
@@ -33,6 +36,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Dark mode functionality
     initializeDarkMode();
+    
+    // Unread chat badge
+    initializeUnreadBadge();
 });
 
 // Dark Mode Toggle
@@ -89,6 +95,29 @@ function initializeDarkMode() {
     }
 }
 
+// Unread Chat Badge
+function initializeUnreadBadge() {
+    if (!document.getElementById('chat-unread-badge')) return;
+    setInterval(refreshUnreadBadge, 60000);
+}
+
+function refreshUnreadBadge() {
+    const badge = document.getElementById('chat-unread-badge');
+    if (!badge) return;
+    
+    fetch('/api/unread/')
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            badge.textContent = data.unread;
+            badge.classList.toggle('d-none', data.unread === 0);
+        }
+    })
+    .catch(error => {
+        console.error('Error refreshing unread badge:', error);
+    });
+}
+
 // File Upload with Drag and Drop
 function initializeFileUpload() {
     const fileInputs = document.querySelectorAll('input[type="file"]');
@@ -102,7 +131,7 @@ function initializeFileUpload() {
         dropArea.innerHTML = `
             <i class="bi bi-cloud-upload fs-1 text-muted"></i>
             <p class="mt-2 mb-0">Drag and drop files here or click to browse</p>
-            <small class="text-muted">Max 10MB per file</small>
+            <small class="text-muted">${input.dataset.maxLabel || 'Max 10MB per file'}</small>
         `;
         
         // Insert drop area before the input
@@ -142,6 +171,141 @@ function initializeFileUpload() {
     });
 }
 
+// Chunked, resumable attachment uploads
+const CRC32_TABLE = (() => {
+    const table = new Uint32Array(256);
+    for (let n = 0; n < 256; n++) {
+        let c = n;
+        for (let k = 0; k < 8; k++) {
+            c = c & 1 ? 0xEDB88320 ^ (c >>> 1) : c >>> 1;
+        }
+        table[n] = c >>> 0;
+    }
+    return table;
+})();
+
+// Continue a CRC32 over more bytes, matching Python's zlib.crc32(data, crc)
+function crc32(bytes, crc = 0) {
+    crc = (crc ^ 0xFFFFFFFF) >>> 0;
+    for (let i = 0; i < bytes.length; i++) {
+        crc = CRC32_TABLE[(crc ^ bytes[i]) & 0xFF] ^ (crc >>> 8);
+    }
+    return (crc ^ 0xFFFFFFFF) >>> 0;
+}
+
+async function fileChecksum(file, end, blockSize) {
+    let crc = 0;
+    for (let start = 0; start < end; start += blockSize) {
+        const bytes = new Uint8Array(await file.slice(start, Math.min(start + blockSize, end)).arrayBuffer());
+        crc = crc32(bytes, crc);
+    }
+    return crc;
+}
+
+function initializeChunkedUpload() {
+    const form = document.getElementById('attachment-upload-form');
+    if (!form || !window.fetch || !window.Blob || !Blob.prototype.arrayBuffer) return;
+    
+    form.addEventListener('submit', async (e) => {
+        const input = form.querySelector('input[type="file"]');
+        if (!input.files.length) return;
+        e.preventDefault();
+        
+        const button = form.querySelector('button[type="submit"]');
+        button.disabled = true;
+        try {
+            await chunkedUpload(form, input.files[0]);
+            window.location.reload();
+        } catch (error) {
+            const errorBox = document.getElementById('upload-error');
+            errorBox.textContent = `Upload failed: ${error.message}. Submit again to resume.`;
+            errorBox.classList.remove('d-none');
+            button.disabled = false;
+        }
+    });
+}
+
+async function uploadRequest(url, options) {
+    const response = await fetch(url, {
+        ...options,
+        headers: {'X-CSRFToken': getCookie('csrftoken'), ...(options.headers || {})},
+    });
+    const data = await response.json();
+    return {response, data};
+}
+
+async function chunkedUpload(form, file) {
+    const progress = document.getElementById('upload-progress');
+    const bar = progress.querySelector('.progress-bar');
+    const showProgress = (offset) => {
+        const percent = Math.floor(offset * 100 / file.size);
+        bar.style.width = `${percent}%`;
+        bar.textContent = `${percent}%`;
+    };
+    progress.classList.remove('d-none');
+    document.getElementById('upload-error').classList.add('d-none');
+    
+    let {data: session} = await uploadRequest(form.dataset.chunkedUploadUrl, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({ticket_id: form.dataset.ticketId, filename: file.name, size: file.size}),
+    });
+    if (!session.success) throw new Error(session.error);
+    
+    const sessionUrl = `${form.dataset.chunkedUploadUrl}${session.upload_id}/`;
+    
+    // Resuming: only continue if the server holds the same bytes we have
+    let offset = session.offset;
+    let checksum = session.checksum;
+    if (offset > 0 && await fileChecksum(file, offset, session.chunk_size) !== checksum) {
+        await uploadRequest(sessionUrl, {method: 'DELETE'});
+        return chunkedUpload(form, file);
+    }
+    
+    let failures = 0;
+    while (offset < file.size) {
+        showProgress(offset);
+        const chunk = file.slice(offset, Math.min(offset + session.chunk_size, file.size));
+        const chunkChecksum = crc32(new Uint8Array(await chunk.arrayBuffer()), checksum);
+        
+        let result;
+        try {
+            result = await uploadRequest(sessionUrl, {
+                method: 'PUT',
+                headers: {
+                    'Content-Type': 'application/octet-stream',
+                    'X-Upload-Offset': String(offset),
+                    'X-Upload-Checksum': chunkChecksum.toString(16),
+                },
+                body: chunk,
+            });
+        } catch (error) {
+            result = null;
+        }
+        
+        if (result && result.data.success) {
+            offset = result.data.offset;
+            checksum = result.data.checksum;
+            failures = 0;
+            continue;
+        }
+        
+        // Network errors and rejected chunks are retried from the server's offset
+        if (++failures > 5) {
+            throw new Error(result ? result.data.error : 'connection lost');
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** failures));
+        const state = await uploadRequest(sessionUrl, {method: 'GET'});
+        offset = state.data.offset;
+        checksum = state.data.checksum;
+    }
+    
+    showProgress(file.size);
+    const {data: completed} = await uploadRequest(`${sessionUrl}complete/`, {method: 'POST'});
+    if (!completed.success) throw new Error(completed.error);
+    return completed.attachment;
+}
+
 function updateFileDisplay(input, files) {
     const dropArea = input.previousElementSibling;
     const fileList = Array.from(files).map(file => 
@@ -166,7 +330,7 @@ function formatFileSize(bytes) {
 
 // Chat Functionality
 function initializeChat() {
-    const chatContainer = document.getElementById('chat-container');
+    const chatContainer = document.getElementById('messages-container');
     if (!chatContainer) return;
     
     const messageInput = document.getElementById('message-input');
@@ -192,13 +356,175 @@ function initializeChat() {
             }
         });
         
-        // Auto-refresh messages every 5 seconds
-        setInterval(() => {
-            if (userSelect.value) {
-                loadMessages(userSelect.value);
+        // Load older history when scrolled to the top
+        const messagesContainer = document.getElementById('messages-container');
+        messagesContainer.addEventListener('scroll', () => {
+            if (messagesContainer.scrollTop < 50) {
+                loadOlderMessages();
             }
-        }, 5000);
+        });
+        
+        // Recipient typeahead
+        initializeUserSearch();
+        
+        // Receive new messages pushed by the server when streaming is available
+        initializeChatStream(userSelect);
+        
+        // Fall back to long-polling while the stream is down
+        pollMessages(userSelect);
+    }
+}
+
+// Chat recipient typeahead, backed by the indexed user directory
+let userSearchTimer = null;
+let userSearchRequest = 0;
+
+function initializeUserSearch() {
+    const searchInput = document.getElementById('user-search');
+    if (!searchInput) return;
+    
+    searchInput.addEventListener('input', () => {
+        clearTimeout(userSearchTimer);
+        userSearchTimer = setTimeout(() => searchChatUsers(searchInput), 250);
+    });
+}
+
+function searchChatUsers(searchInput) {
+    const results = document.getElementById('user-search-results');
+    const query = searchInput.value.trim();
+    const requestId = ++userSearchRequest;
+    
+    if (!query) {
+        results.innerHTML = '<div class="text-center text-muted small">Start typing to find someone to chat with</div>';
+        return;
     }
+    
+    fetch(`${searchInput.dataset.url}?q=${encodeURIComponent(query)}`)
+    .then(response => response.json())
+    .then(data => {
+        // Ignore responses that arrive after a newer query was sent
+        if (requestId !== userSearchRequest || !data.success) return;
+        
+        if (data.users.length === 0) {
+            results.innerHTML = '<div class="text-center text-muted small">No matching users</div>';
+            return;
+        }
+        
+        results.innerHTML = data.users.map(user => {
+            const label = user.name + (user.is_it_staff ? ' (IT Staff)' : '');
+            return `
+                <div class="d-flex align-items-center mb-2 p-2 border rounded user-item"
+                     data-user-id="${user.id}" data-user-label="${escapeHtml(label)}" style="cursor: pointer;">
+                    <div class="flex-shrink-0">
+                        <div class="bg-primary text-white rounded-circle d-flex align-items-center justify-content-center"
+                             style="width: 32px; height: 32px;">
+                            ${escapeHtml(user.username.charAt(0).toUpperCase())}
+                        </div>
+                    </div>
+                    <div class="flex-grow-1 ms-2">
+                        <div class="fw-bold small">
+                            <i class="bi bi-circle-fill ${user.online ? 'text-success' : 'text-secondary'}" style="font-size: 0.5rem;" title="${user.online ? 'Online' : 'Offline'}"></i>
+                            ${escapeHtml(user.name)}
+                        </div>
+                        <div class="small text-muted">
+                            <span class="badge ${user.is_it_staff ? 'bg-info' : 'bg-secondary'}">${user.is_it_staff ? 'IT Staff' : 'User'}</span>
+                            ${user.department ? '• ' + escapeHtml(user.department) : ''}
+                        </div>
+                    </div>
+                </div>
+            `;
+        }).join('');
+    })
+    .catch(error => {
+        console.error('Error searching users:', error);
+    });
+}
+
+// Select a chat recipient, adding them to the dropdown if they are not listed yet
+function selectChatUser(userId, label) {
+    const userSelect = document.getElementById('user-select');
+    if (!userSelect) return;
+    
+    if (!userSelect.querySelector(`option[value="${userId}"]`)) {
+        const option = document.createElement('option');
+        option.value = userId;
+        option.textContent = label;
+        userSelect.appendChild(option);
+    }
+    userSelect.value = userId;
+    userSelect.dispatchEvent(new Event('change'));
+}
+
+// Long-poll loop for WSGI deployments. The server holds each request until
+// something changes, so an idle conversation costs one request per timeout.
+function pollMessages(userSelect) {
+    const userId = userSelect.value;
+    const retry = (delay) => setTimeout(() => pollMessages(userSelect), delay);
+    
+    if (!userId || isChatStreamOpen() || chatState.userId !== userId || chatState.lastId === null) {
+        retry(1000);
+        return;
+    }
+    
+    fetch(`/api/wait-messages/${userId}/?since_id=${chatState.lastId}`)
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            applyMessageDelta(userId, data);
+        }
+        retry(250);
+    })
+    .catch(error => {
+        console.error('Error polling messages:', error);
+        retry(5000);
+    });
+}
+
+// Server-Sent Events chat stream
+let chatStream = null;
+
+function initializeChatStream(userSelect) {
+    if (!window.EventSource) return;
+    
+    chatStream = new EventSource('/api/chat-stream/');
+    
+    chatStream.addEventListener('open', () => {
+        // Catch up on anything sent while the stream was disconnected
+        if (userSelect.value) {
+            loadMessages(userSelect.value);
+        }
+    });
+    
+    chatStream.addEventListener('chat_message', (e) => {
+        const msg = JSON.parse(e.data);
+        const otherId = String(msg.is_sender ? msg.receiver_id : msg.sender_id);
+        if (userSelect.value !== otherId) return;
+        
+        if (msg.is_sender) {
+            appendMessage(msg);
+        } else {
+            // Fetch the delta so the incoming message is marked as read
+            loadMessages(otherId);
+        }
+    });
+    
+    // Something was published by another server process; fetch what changed
+    chatStream.addEventListener('chat_resync', () => {
+        if (userSelect.value) {
+            loadMessages(userSelect.value);
+        }
+    });
+    
+    chatStream.addEventListener('chat_read', (e) => {
+        const receipt = JSON.parse(e.data);
+        if (userSelect.value === String(receipt.reader_id)) {
+            markMessagesRead(receipt.last_read_id);
+        }
+    });
+}
+
+function isChatStreamOpen() {
+    return chatStream !== null && chatStream.readyState === EventSource.OPEN;
 }
 
 function sendMessage() {
@@ -227,7 +553,7 @@ function sendMessage() {
     .then(data => {
         if (data.success) {
             messageInput.value = '';
-            loadMessages(userSelect.value);
+            appendMessage(data.message);
         } else {
             alert('Error sending message: ' + data.error);
         }
@@ -242,12 +568,37 @@ function sendMessage() {
     });
 }
 
+// Conversation shown in the chat window, with cursors for both ends of the
+// loaded history and whether older pages live in the hot table or the archive
+const chatState = {
+    userId: null,
+    lastId: null,
+    oldestId: null,
+    hasOlder: false,
+    olderInArchive: false,
+    loadingOlder: false
+};
+
 function loadMessages(userId) {
-    fetch(`/api/get-messages/${userId}/`)
+    // Once a conversation is on screen only fetch messages newer than the last one
+    const isDelta = chatState.userId === userId && chatState.lastId !== null;
+    const url = isDelta
+        ? `/api/get-messages/${userId}/?since_id=${chatState.lastId}`
+        : `/api/get-messages/${userId}/`;
+    
+    fetch(url)
     .then(response => response.json())
     .then(data => {
-        if (data.success) {
+        if (!data.success) return;
+        
+        if (isDelta) {
+            applyMessageDelta(userId, data);
+        } else {
+            chatState.userId = userId;
             displayMessages(data.messages);
+            setOlderHistory(data);
+            markMessagesRead(data.last_read_id);
+            refreshUnreadBadge();
         }
     })
     .catch(error => {
@@ -255,23 +606,126 @@ function loadMessages(userId) {
     });
 }
 
+function setOlderHistory(data) {
+    if (data.has_more) {
+        chatState.hasOlder = true;
+    } else if (data.more_in_archive) {
+        chatState.hasOlder = true;
+        chatState.olderInArchive = true;
+    } else {
+        chatState.hasOlder = false;
+    }
+}
+
+function loadOlderMessages() {
+    const userId = chatState.userId;
+    if (!userId || !chatState.hasOlder || chatState.loadingOlder || chatState.oldestId === null) return;
+    
+    const endpoint = chatState.olderInArchive ? 'chat-archive' : 'get-messages';
+    chatState.loadingOlder = true;
+    
+    fetch(`/api/${endpoint}/${userId}/?before_id=${chatState.oldestId}`)
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success || chatState.userId !== userId) return;
+        prependMessages(data.messages);
+        setOlderHistory(data);
+    })
+    .catch(error => {
+        console.error('Error loading older messages:', error);
+    })
+    .finally(() => {
+        chatState.loadingOlder = false;
+    });
+}
+
+function prependMessages(messages) {
+    const messagesContainer = document.getElementById('messages-container');
+    if (!messagesContainer || !messages.length) return;
+    
+    // Keep the visible messages in place while older ones are added above
+    const previousHeight = messagesContainer.scrollHeight;
+    messagesContainer.insertAdjacentHTML('afterbegin', messages.map(renderMessage).join(''));
+    messagesContainer.scrollTop += messagesContainer.scrollHeight - previousHeight;
+    chatState.oldestId = messages[0].id;
+}
+
+function applyMessageDelta(userId, data) {
+    if (chatState.userId !== userId) return;
+    
+    data.messages.forEach(appendMessage);
+    // Only server deltas move the cursor: a message appended from the send
+    // response can overtake an earlier incoming one that is not shown yet
+    if (data.messages.length) {
+        chatState.lastId = Math.max(chatState.lastId || 0, data.messages[data.messages.length - 1].id);
+    }
+    markMessagesRead(data.last_read_id);
+    if (data.messages.some(msg => !msg.is_sender)) {
+        refreshUnreadBadge();
+    }
+    
+    if (data.has_more) {
+        loadMessages(userId);
+    }
+}
+
 function displayMessages(messages) {
     const messagesContainer = document.getElementById('messages-container');
     if (!messagesContainer) return;
     
-    messagesContainer.innerHTML = messages.map(msg => `
-        <div class="d-flex mb-3 ${msg.is_sender ? 'justify-content-end' : 'justify-content-start'}">
+    messagesContainer.innerHTML = messages.map(renderMessage).join('');
+    chatState.lastId = messages.length ? messages[messages.length - 1].id : 0;
+    chatState.oldestId = messages.length ? messages[0].id : null;
+    chatState.olderInArchive = false;
+    
+    // Scroll to bottom
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+}
+
+function markMessagesRead(lastReadId) {
+    if (!lastReadId) return;
+    
+    document.querySelectorAll('#messages-container .read-receipt.bi-check2').forEach(icon => {
+        const messageId = Number(icon.closest('[data-message-id]').dataset.messageId);
+        if (messageId <= lastReadId) {
+            icon.classList.replace('bi-check2', 'bi-check2-all');
+        }
+    });
+}
+
+function appendMessage(msg) {
+    const messagesContainer = document.getElementById('messages-container');
+    if (!messagesContainer) return;
+    
+    // The same message can arrive from both the send response and the stream
+    if (messagesContainer.querySelector(`[data-message-id="${msg.id}"]`)) return;
+    if (!messagesContainer.querySelector('[data-message-id]')) {
+        messagesContainer.innerHTML = '';
+    }
+    
+    // Keep id order when a delta brings in a message older than one already shown
+    const later = Array.from(messagesContainer.querySelectorAll('[data-message-id]'))
+        .find(el => Number(el.dataset.messageId) > msg.id);
+    if (later) {
+        later.insertAdjacentHTML('beforebegin', renderMessage(msg));
+    } else {
+        messagesContainer.insertAdjacentHTML('beforeend', renderMessage(msg));
+    }
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+}
+
+function renderMessage(msg) {
+    return `
+        <div class="d-flex mb-3 ${msg.is_sender ? 'justify-content-end' : 'justify-content-start'}" data-message-id="${msg.id}">
             <div class="chat-message ${msg.is_sender ? 'sent' : 'received'}">
                 <div class="message-content">${escapeHtml(msg.message)}</div>
                 <div class="message-time small text-muted mt-1">
                     ${new Date(msg.timestamp).toLocaleTimeString()}
+                    ${msg.is_sender ? `<i class="bi ${msg.is_read ? 'bi-check2-all' : 'bi-check2'} read-receipt"></i>` : ''}
                 </div>
             </div>
         </div>
-    `).join('');
-    
-    // Scroll to bottom
-    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    `;
 }
 
 // Search Functionality
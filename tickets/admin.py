@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import UserProfile, Ticket, Comment, Attachment, ChatMessage, TicketNotification
+from .models import (
+    UserProfile, Ticket, Comment, Attachment, StoredBlob, UploadSession, ChatMessage, Conversation, ArchivedChatMessage,
+    TicketNotification, StorageUsage,
+)
 
 
 class UserProfileInline(admin.StackedInline):
@@ -11,7 +14,8 @@ class UserProfileInline(admin.StackedInline):
     model = UserProfile
     can_delete = False
     verbose_name_plural = 'Profile'
-    fields = ('department', 'is_it_staff', 'phone_number', 'dark_mode')
+    fields = ('department', 'is_it_staff', 'phone_number', 'dark_mode', 'last_seen')
+    readonly_fields = ('last_seen',)
 
 
 class CustomUserAdmin(UserAdmin):
@@ -105,6 +109,65 @@ class AttachmentAdmin(admin.ModelAdmin):
     readonly_fields = ('original_filename', 'file_size', 'uploaded_at')
 
 
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for deduplicated attachment files
+    """
+    list_display = ('content_hash', 'size', 'ref_count', 'storage_tier', 'created_at', 'updated_at')
+    list_filter = ('storage_tier', 'created_at')
+    search_fields = ('content_hash',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StorageUsage)
+class StorageUsageAdmin(admin.ModelAdmin):
+    """
+    Read-only report of attachment storage per ticket, user and department
+    """
+    list_display = ('label', 'scope', 'get_size', 'get_quota', 'file_count', 'updated_at')
+    list_filter = ('scope',)
+    search_fields = ('label',)
+    ordering = ('-bytes_used',)
+
+    def get_size(self, obj):
+        return obj.get_size_display()
+    get_size.short_description = 'Size'
+    get_size.admin_order_field = 'bytes_used'
+
+    def get_quota(self, obj):
+        return obj.get_quota_display()
+    get_quota.short_description = 'Quota used'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for chunked upload sessions
+    """
+    list_display = ('filename', 'ticket', 'uploaded_by', 'received_size', 'total_size', 'status', 'updated_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('filename', 'ticket__ticket_id', 'uploaded_by__username')
+    list_select_related = ('ticket', 'uploaded_by')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
     """
@@ -116,6 +179,34 @@ class ChatMessageAdmin(admin.ModelAdmin):
     readonly_fields = ('timestamp',)
 
 
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    """
+    Admin interface for Conversation model
+    """
+    list_display = ('user_low', 'user_high', 'last_message_at', 'user_low_unread', 'user_high_unread')
+    search_fields = ('user_low__username', 'user_high__username')
+    readonly_fields = ('last_message', 'last_message_sender', 'last_message_preview', 'last_message_at', 'created_at')
+    list_select_related = ('user_low', 'user_high')
+
+
+@admin.register(ArchivedChatMessage)
+class ArchivedChatMessageAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for archived chat messages
+    """
+    list_display = ('sender', 'receiver', 'timestamp', 'archived_at')
+    list_filter = ('timestamp', 'archived_at')
+    search_fields = ('sender__username', 'receiver__username')
+    list_select_related = ('sender', 'receiver')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(TicketNotification)
 class TicketNotificationAdmin(admin.ModelAdmin):
     """
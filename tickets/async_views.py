@@ -0,0 +1,208 @@
+"""
+Async versions of the most requested read views, used under ASGI.
+
+asgi.py sets TICKETS_ASYNC_VIEWS, and tickets.urls then routes the
+dashboard, ticket detail, analytics and chat history to these views. While
+one of them waits on the database the worker's event loop serves other
+requests, so a single ASGI worker handles many slow requests at once.
+Under WSGI the sync views in tickets.views stay in place: there each async
+view would get an event loop of its own and only add overhead.
+
+Lookups that depend on each other use the async ORM. Django runs all of a
+request's async ORM calls on one thread, one after another. So queries that
+are independent of each other, like the dashboard's ticket page, counters
+and recent activity, each get a worker thread and a connection of their own
+and run at the same time. Templates are rendered on the request's thread,
+where lazy lookups made while rendering (the user, the unread badge) are
+allowed.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from . import caching, views
+from .chat_events import publish_to_user
+from .forms import AttachmentForm, CommentForm
+from .models import Conversation, Ticket
+from .templatetags.fragments import ticket_fragment_version
+from .unread import invalidate_unread
+
+_render = sync_to_async(render)
+
+
+def _in_own_thread(call):
+    """
+    Run ``call`` in a worker thread, closing that thread's connections afterwards
+    """
+    def run():
+        try:
+            return call()
+        finally:
+            connections.close_all()
+    return sync_to_async(run, thread_sensitive=False)()
+
+
+async def _concurrently(**calls):
+    """
+    Run independent database calls at the same time; returns their results by name
+    """
+    results = await asyncio.gather(*(_in_own_thread(call) for call in calls.values()))
+    return dict(zip(calls, results))
+
+
+async def _fragment_cached(name, *vary_on):
+    """
+    Whether the template's {% cache name *vary_on %} fragment is stored, so its data need not be loaded
+    """
+    if not settings.TEMPLATE_FRAGMENT_TIMEOUT:
+        return False
+    return await cache.ahas_key(make_template_fragment_key(name, vary_on))
+
+
+@login_required
+async def dashboard_view(request):
+    """
+    Main dashboard view showing tickets and analytics
+    """
+    user = await request.auser()
+    profile = user.profile
+    filters = views._dashboard_filters(request)
+    tickets = views._dashboard_tickets(user, profile, filters)
+    page_number = request.GET.get('page')
+
+    def load_page():
+        page_obj = Paginator(tickets, 10).get_page(page_number)
+        page_obj.object_list = list(page_obj.object_list)
+        return page_obj
+
+    results = await _concurrently(
+        page_obj=load_page,
+        analytics=lambda: views._dashboard_analytics(tickets, user, profile, filters),
+        recent_comments=lambda: list(views._recent_comments(tickets)),
+    )
+    context = views._dashboard_context(filters=filters, profile=profile, **results)
+
+    return await _render(request, 'tickets/dashboard.html', context)
+
+
+@login_required
+async def ticket_detail_view(request, ticket_id):
+    """
+    View ticket details with comments and attachments
+    """
+    if request.method == 'POST':
+        # New comments and uploads go through the sync view's form handling
+        return await sync_to_async(views.ticket_detail_view)(request, ticket_id)
+
+    user = await request.auser()
+    profile = user.profile
+    ticket = await aget_object_or_404(
+        Ticket.objects.select_related('created_by', 'assigned_to', 'escalated_to'), ticket_id=ticket_id,
+    )
+    if not profile.is_it_staff and ticket.created_by_id != user.id:
+        messages.error(request, 'You do not have permission to view this ticket.')
+        return redirect('tickets:dashboard')
+
+    comments = views._visible_comments(ticket, profile)
+    attachments = ticket.attachments.select_related('uploaded_by')
+
+    # Lists whose fragment is cached stay lazy; the template only queries them if the fragment expired meanwhile
+    version = await sync_to_async(ticket_fragment_version)(ticket)
+    loads = {}
+    if not await _fragment_cached('ticket_comments', ticket.pk, version, profile.is_it_staff):
+        loads['comments'] = lambda: list(comments)
+    if not await _fragment_cached('ticket_attachments', ticket.pk, version):
+        loads['attachments'] = lambda: list(attachments)
+    loaded = await _concurrently(**loads)
+
+    context = views._ticket_detail_context(
+        ticket, loaded.get('comments', comments), loaded.get('attachments', attachments),
+        CommentForm(), AttachmentForm(), profile,
+    )
+
+    return await _render(request, 'tickets/ticket_detail.html', context)
+
+
+@login_required
+async def get_messages_view(request, user_id):
+    """
+    Get messages between current user and specified user (AJAX)
+
+    Same parameters and response as tickets.views.get_messages_view.
+    """
+    try:
+        user = await request.auser()
+        other_user = await aget_object_or_404(User, id=user_id)
+        since_id, before_id, limit = views._history_params(request)
+
+        conversation = await sync_to_async(Conversation.between)(user, other_user)
+        if conversation is None:
+            return JsonResponse({'success': True, 'messages': [], 'has_more': False,
+                                 'more_in_archive': False, 'last_read_id': None})
+        chat_messages = conversation.messages.all()
+
+        marked = await sync_to_async(conversation.mark_read)(user)
+
+        loads = {
+            'page': lambda: views._message_page(chat_messages, since_id, before_id, limit),
+            'last_read_id': lambda: chat_messages.filter(sender=user, is_read=True).aggregate(last=Max('id'))['last'],
+        }
+        if since_id is None:
+            loads['in_archive'] = lambda: conversation.archived_messages.exists()
+        if marked:
+            loads['read_up_to'] = lambda: chat_messages.filter(sender=other_user).aggregate(last=Max('id'))['last']
+        results = await _concurrently(**loads)
+
+        if marked:
+            # Tell the sender how far their messages have been read
+            await sync_to_async(invalidate_unread)(user.id)
+            await sync_to_async(publish_to_user)(
+                other_user.id, 'chat_read', {'reader_id': user.id, 'last_read_id': results['read_up_to']},
+            )
+
+        page, has_more = results['page']
+        return JsonResponse({
+            'success': True,
+            'messages': [views._serialize_message(msg, user) for msg in page],
+            'has_more': has_more,
+            'more_in_archive': not has_more and results.get('in_archive', False),
+            'last_read_id': results['last_read_id'],
+        })
+
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+async def _ticket_analytics():
+    sections = await _concurrently(**{section.__name__: section for section in views.ANALYTICS_SECTIONS})
+    context = {}
+    for values in sections.values():
+        context.update(values)
+    return context
+
+
+@login_required
+async def analytics_view(request):
+    """
+    Analytics dashboard (IT staff only)
+    """
+    user = await request.auser()
+    if not user.profile.is_it_staff:
+        messages.error(request, 'You do not have permission to view analytics.')
+        return redirect('tickets:dashboard')
+
+    context = await caching.aget_or_set('analytics', ('overview',), _ticket_analytics)
+
+    return await _render(request, 'tickets/analytics.html', context)
@@ -0,0 +1,76 @@
+"""
+Bulk ingestion of attachments submitted together with a ticket.
+
+Files are written to attachment storage concurrently before the database
+transaction starts, so the transaction only covers the inserts. All rows
+are then created with one bulk_create and the blob references with a
+fixed number of queries. If the transaction fails, the files it wrote are
+left in place: a concurrent upload of the same content may have deduplicated
+against them without having committed yet, so only gc_attachment_blobs,
+after its grace period, removes blob files that no StoredBlob row uses.
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from . import caching
+from .models import Attachment, StorageUsage, StoredBlob
+from .storage import attachment_storage, hash_from_name
+from .thumbnails import schedule_previews
+
+StoredUpload = namedtuple('StoredUpload', ['name', 'created', 'original_filename', 'size'])
+
+
+def _store(file):
+    name, created = attachment_storage.save_blob(file)
+    return StoredUpload(name, created, os.path.basename(file.name), file.size)
+
+
+def store_uploads(files):
+    """
+    Write uploaded files to storage in parallel, returning a StoredUpload for each
+    """
+    if len(files) <= 1:
+        return [_store(file) for file in files]
+    
+    stored = []
+    error = None
+    with ThreadPoolExecutor(max_workers=min(len(files), settings.ATTACHMENT_INGEST_WORKERS)) as pool:
+        for future in [pool.submit(_store, file) for file in files]:
+            try:
+                stored.append(future.result())
+            except Exception as e:
+                error = error or e
+    
+    if error is not None:
+        raise error
+    return stored
+
+
+def create_attachments(ticket, user, stored):
+    """
+    Insert Attachment rows for stored uploads; call inside the ticket's transaction
+    """
+    StoredBlob.acquire_many([(upload.name, upload.size) for upload in stored])
+    attachments = Attachment.objects.bulk_create([
+        Attachment(
+            ticket=ticket,
+            uploaded_by=user,
+            file=upload.name,
+            blob_id=hash_from_name(upload.name),
+            original_filename=upload.original_filename,
+            file_size=upload.size,
+        )
+        for upload in stored
+    ])
+    # bulk_create skips post_save, so count usage, refresh the ticket page and queue previews here
+    if stored:
+        StorageUsage.record(ticket, user, sum(upload.size for upload in stored), count=len(stored))
+        caching.invalidate(caching.ticket_namespace(ticket.pk))
+    for attachment in attachments:
+        schedule_previews(attachment)
+    return attachments
+
@@ -0,0 +1,75 @@
+"""
+Authentication backend that loads each request's user together with its profile.
+
+Almost every page reads ``request.user.profile`` (views, and base.html for dark
+mode and the staff menu), which with the stock ModelBackend costs a second
+query per request. The profile is cached across requests, so a request
+normally loads the user in one query and takes the profile from the cache. On
+a miss, both are loaded in one joined query. The cached copy is dropped
+whenever the profile is saved or deleted. It is kept in the shared cache tier
+only: is_it_staff authorizes staff-only pages, and a worker's local copy would
+keep honouring a revoked flag after another worker dropped the shared one.
+
+Only the profile is cached. The user row (with its password hash, which
+session verification needs) is always read fresh.
+"""
+
+import copy
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+from .cache_backends import TieredCache
+from .models import UserProfile
+
+PROFILE_KEY = 'profile:user:{}'
+
+
+def _cache():
+    cache = caches['default']
+    return cache.shared if isinstance(cache, TieredCache) else cache
+
+
+def invalidate_profile(user_id):
+    _cache().delete(PROFILE_KEY.format(user_id))
+
+
+def _detached(profile):
+    """
+    Copy of ``profile`` without its cached related user, safe to store in the cache
+    """
+    clone = copy.copy(profile)
+    clone._state = copy.copy(profile._state)
+    clone._state.fields_cache = {}
+    return clone
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend whose get_user() attaches the user's cached UserProfile
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        cache = _cache()
+        key = PROFILE_KEY.format(user_id)
+        profile = cache.get(key)
+        if profile is not None:
+            user = UserModel._default_manager.filter(pk=user_id).first()
+            if user is not None:
+                user.profile = profile
+        else:
+            user = UserModel._default_manager.select_related('profile').filter(pk=user_id).first()
+            if user is not None:
+                try:
+                    cache.set(key, _detached(user.profile), settings.PROFILE_CACHE_TIMEOUT)
+                except UserProfile.DoesNotExist:
+                    pass
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # ModelBackend's async version queries without the profile
+        return await sync_to_async(self.get_user)(user_id)
@@ -0,0 +1,245 @@
+"""
+Two-tier cache backend.
+
+A small LRU cache inside each worker process sits in front of a shared cache
+that every worker uses (Redis in production, a file or database cache
+otherwise). Reads that hit the local tier cost no network round trip. Writes
+and deletes go to both tiers. Other processes may keep serving their local
+copy for up to ``LOCAL_TIMEOUT`` seconds after a change, so that bounds how
+stale a value can be. Counters (incr/decr) always go to the shared tier.
+
+Configure it as the default cache with the shared tier as another alias::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'tickets.cache_backends.TieredCache',
+            'OPTIONS': {'SHARED': 'shared', 'LOCAL_MAX_ENTRIES': 1000, 'LOCAL_TIMEOUT': 5},
+        },
+        'shared': {...},
+    }
+"""
+
+import atexit
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+STATS_KEY = 'cache-stats:{}'
+
+_MISSING = object()
+
+
+class CacheStats:
+    """
+    Hit and miss counters, summed over all workers in the shared cache
+
+    Counts are kept in memory and added to the shared totals at most once per
+    CACHE_STATS_FLUSH_INTERVAL seconds, so recording them costs no round trip.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._last_flush = time.monotonic()
+
+    def _cache(self):
+        # Straight to the shared tier, so totals are current and reading them is not counted
+        cache = caches['default']
+        return cache.shared if isinstance(cache, TieredCache) else cache
+
+    def incr(self, name, delta=1):
+        with self._lock:
+            self._counts[name] += delta
+            due = time.monotonic() - self._last_flush >= settings.CACHE_STATS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._last_flush = time.monotonic()
+        if not counts:
+            return
+        cache = self._cache()
+        try:
+            for name, delta in counts.items():
+                key = STATS_KEY.format(name)
+                if not cache.add(key, delta, None):
+                    cache.incr(key, delta)
+        except Exception as e:
+            print(f"Failed to record cache statistics: {e}")
+
+    def totals(self, names):
+        """
+        Shared totals for ``names``, including what this process has not flushed yet
+        """
+        self.flush()
+        found = self._cache().get_many([STATS_KEY.format(name) for name in names])
+        return {name: found.get(STATS_KEY.format(name), 0) for name in names}
+
+    def reset(self, names):
+        with self._lock:
+            self._counts.clear()
+        self._cache().delete_many([STATS_KEY.format(name) for name in names])
+
+
+stats = CacheStats()
+atexit.register(stats.flush)
+
+
+class _LocalLRU:
+    """
+    Thread-safe LRU mapping of key -> (pickled value, expiry)
+    """
+
+    def __init__(self, max_entries):
+        self._max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            pickled, expires = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            self.delete(key)
+            return
+        # Pickled so callers that mutate a returned value do not change the cached one
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (pickled, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache(BaseCache):
+    """
+    In-process LRU tier in front of a shared cache alias
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'shared')
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self._local = _LocalLRU(options.get('LOCAL_MAX_ENTRIES', 1000))
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_ttl(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self._local_timeout
+        return min(self._local_timeout, timeout - time.time())
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local.set(local_key, value, self._local_ttl(timeout))
+        return added
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self._local.get(local_key)
+        if value is not _MISSING:
+            stats.incr('local_hits')
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            stats.incr('misses')
+            return default
+        stats.incr('shared_hits')
+        self._local.set(local_key, value, self._local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        self.shared.set(key, value, timeout, version=version)
+        self._local.set(local_key, value, self._local_ttl(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.make_and_validate_key(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remaining = []
+        for key in keys:
+            value = self._local.get(self.make_and_validate_key(key, version=version))
+            if value is _MISSING:
+                remaining.append(key)
+            else:
+                found[key] = value
+        if found:
+            stats.incr('local_hits', len(found))
+        if remaining:
+            fetched = self.shared.get_many(remaining, version=version)
+            for key, value in fetched.items():
+                self._local.set(self.make_and_validate_key(key, version=version), value, self._local_timeout)
+            found.update(fetched)
+            if fetched:
+                stats.incr('shared_hits', len(fetched))
+            if len(fetched) < len(remaining):
+                stats.incr('misses', len(remaining) - len(fetched))
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        ttl = self._local_ttl(timeout)
+        for key, value in data.items():
+            if key not in failed:
+                self._local.set(self.make_and_validate_key(key, version=version), value, ttl)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._local.delete(self.make_and_validate_key(key, version=version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        if self._local.get(local_key) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        self._local.clear()
+        self.shared.clear()
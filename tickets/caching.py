@@ -0,0 +1,100 @@
+"""
+Namespaced, versioned cache entries.
+
+Each namespace has a version number stored in the cache, and every key in the
+namespace includes it. Invalidating a namespace bumps the version, so all of
+its entries stop being used at once without deleting them one by one; they
+simply expire. Versions start from the current time in milliseconds, so a
+version key that gets evicted never brings old entries back.
+"""
+
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache_backends import stats
+
+NAMESPACES = ('dashboard', 'analytics', 'calendar', 'staff')
+VERSION_KEY = 'ns:{}:version'
+
+_MISSING = object()
+
+
+def ticket_namespace(ticket_id):
+    """
+    Namespace for entries about a single ticket, invalidated when it or its comments or attachments change
+    """
+    return f'ticket:{ticket_id}'
+
+
+def namespace_version(namespace):
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def make_key(namespace, *parts):
+    """
+    Cache key for ``parts`` in the current version of ``namespace``
+    """
+    raw = ':'.join(str(part) for part in parts)
+    if len(raw) > 100:
+        raw = hashlib.sha1(raw.encode()).hexdigest()
+    return f'ns:{namespace}:{namespace_version(namespace)}:{raw}'
+
+
+def _lookup(namespace, parts):
+    key = make_key(namespace, *parts)
+    value = cache.get(key, _MISSING)
+    stats.incr(f'{namespace}:hits' if value is not _MISSING else f'{namespace}:misses')
+    return key, value
+
+
+def _store(namespace, key, value, timeout):
+    if timeout is None:
+        timeout = settings.CACHE_TIMEOUTS.get(namespace, 300)
+    cache.set(key, value, timeout)
+
+
+def get_or_set(namespace, parts, compute, timeout=None):
+    """
+    Return the cached value for ``parts``, computing and storing it on a miss
+
+    ``timeout`` defaults to CACHE_TIMEOUTS for the namespace. None values are
+    cached too.
+    """
+    key, value = _lookup(namespace, parts)
+    if value is _MISSING:
+        value = compute()
+        _store(namespace, key, value, timeout)
+    return value
+
+
+async def aget_or_set(namespace, parts, compute, timeout=None):
+    """
+    get_or_set() for async views, where ``compute`` is a coroutine function
+    """
+    key, value = await sync_to_async(_lookup)(namespace, parts)
+    if value is _MISSING:
+        value = await compute()
+        await sync_to_async(_store)(namespace, key, value, timeout)
+    return value
+
+
+def invalidate(*namespaces):
+    """
+    Stop using every entry cached in ``namespaces``
+    """
+    for namespace in namespaces:
+        key = VERSION_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Not set yet, or evicted: any fresh version invalidates old entries
+            cache.set(key, int(time.time() * 1000), None)
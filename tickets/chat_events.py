@@ -0,0 +1,221 @@
+"""
+Publish/subscribe plumbing for pushing chat events to connected clients.
+
+Views publish events for a user with ``publish_to_user``; the streaming
+endpoint subscribes to the same channel and forwards each event to the
+browser. The broker class is configurable through ``CHAT_BROKER_BACKEND``
+so the in-process broker can be replaced by a shared one on multi-node
+deployments.
+
+Every publish also bumps a per-user file signal, which lets long-polling
+requests and streams in other worker processes wake up without an external
+service. The signal file records which process published, so a stream can
+tell events its own broker already delivered from ones it missed.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    A single subscriber's queue on a broker channel
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, payload):
+        """
+        Queue a payload from any thread; slow consumers drop events
+        """
+        try:
+            self.loop.call_soon_threadsafe(self._put, payload)
+        except RuntimeError:
+            # Event loop already closed, the client has gone away
+            self.close()
+
+    def _put(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout=None):
+        """
+        Wait for the next payload, returning None on timeout
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Broker that fans events out to subscribers living in this process
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(payload)
+
+    def subscribe(self, channel):
+        """
+        Must be called from a running event loop
+        """
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+
+class FileChatSignal:
+    """
+    Cross-process wake-up signal based on the mtime of one file per user
+
+    Each notify appends the publishing process id to the file, which is
+    emptied again once it grows past MAX_SIZE bytes.
+    """
+
+    MAX_SIZE = 4096
+
+    def __init__(self, directory, interval=0.5):
+        self.directory = str(directory)
+        self.interval = interval
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, user_id):
+        return os.path.join(self.directory, str(int(user_id)))
+
+    def version(self, user_id):
+        try:
+            return os.stat(self._path(user_id)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def position(self, user_id):
+        """
+        Current end of the user's signal file, for notified_elsewhere()
+        """
+        try:
+            return os.stat(self._path(user_id)).st_size
+        except FileNotFoundError:
+            return 0
+
+    def notify(self, user_id):
+        path = self._path(user_id)
+        with open(path, 'a') as f:
+            if f.tell() > self.MAX_SIZE:
+                f.truncate(0)
+            f.write(f'{os.getpid()}\n')
+        os.utime(path)
+
+    def notified_elsewhere(self, user_id, position):
+        """
+        Whether another process notified the user since ``position``; returns it with the new position
+
+        If the file was emptied in between, the answer is True, since who
+        notified can no longer be told.
+        """
+        try:
+            with open(self._path(user_id), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == position:
+                    return False, position
+                if size < position:
+                    return True, size
+                f.seek(position)
+                pids = f.read(size - position).split()
+        except FileNotFoundError:
+            return False, 0
+        own = str(os.getpid()).encode()
+        return any(pid != own for pid in pids), size
+
+    def wait(self, user_id, version, timeout):
+        """
+        Block until the user's signal moves past ``version`` or the timeout expires
+        
+        Sleeps between stat calls so it is cooperative under gevent workers.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.version(user_id) != version:
+                return True
+            time.sleep(min(self.interval, max(deadline - time.monotonic(), 0)))
+        return self.version(user_id) != version
+
+
+_broker = None
+_broker_lock = threading.Lock()
+_signal = None
+
+
+def get_broker():
+    """
+    Return the process-wide broker configured by CHAT_BROKER_BACKEND
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, 'CHAT_BROKER_BACKEND', 'tickets.chat_events.InProcessBroker')
+                _broker = import_string(backend)()
+    return _broker
+
+
+def get_chat_signal():
+    """
+    Return the process-wide file signal rooted at CHAT_SIGNAL_DIR
+    """
+    global _signal
+    if _signal is None:
+        with _broker_lock:
+            if _signal is None:
+                _signal = FileChatSignal(settings.CHAT_SIGNAL_DIR, settings.CHAT_LONG_POLL_INTERVAL)
+    return _signal
+
+
+def user_channel(user_id):
+    return f'chat.user.{user_id}'
+
+
+def publish_to_user(user_id, event_type, data):
+    """
+    Publish an event to a user's channel once the current transaction commits
+    """
+    payload = {'type': event_type, 'data': data}
+    
+    def publish():
+        get_broker().publish(user_channel(user_id), payload)
+        get_chat_signal().notify(user_id)
+    
+    transaction.on_commit(publish)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .unread import get_unread_count
+
+
+def chat_unread(request):
+    """
+    Unread chat message count for the navigation badge, evaluated only when rendered
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'chat_unread_count': SimpleLazyObject(lambda: get_unread_count(user))}
+
+
+def fragment_cache(request):
+    """
+    Lifetime of {% cache %} fragments; the render benchmark sets it to 0 to measure without them
+    """
+    return {'fragment_timeout': settings.TEMPLATE_FRAGMENT_TIMEOUT}
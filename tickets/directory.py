@@ -0,0 +1,93 @@
+"""
+User directory: prefix search for the chat recipient typeahead and the cached
+list of IT staff.
+
+Each user's username, first and last name and department words are stored as
+lowercase UserSearchToken rows, so a typed prefix becomes an indexed
+``LIKE 'prefix%'`` lookup instead of a scan of the user table.
+
+The IT staff list feeds the assignment and escalation dropdowns and staff
+notification emails. It is kept in the ``staff`` cache namespace, which is
+invalidated whenever a user or profile is saved or deleted.
+"""
+
+from collections import namedtuple
+
+from django.contrib.auth.models import User
+
+from . import caching
+from .models import UserSearchToken
+
+StaffMember = namedtuple('StaffMember', ['id', 'name', 'email'])
+
+MAX_QUERY_TERMS = 3
+TOKEN_MAX_LENGTH = 100
+
+
+def tokenize(*values):
+    """
+    Split values into the set of lowercase words they contain
+    """
+    tokens = set()
+    for value in values:
+        for word in (value or '').lower().split():
+            tokens.add(word[:TOKEN_MAX_LENGTH])
+    return tokens
+
+
+def user_search_tokens(user):
+    profile = getattr(user, 'profile', None)
+    department = profile.department if profile else ''
+    return tokenize(user.username, user.first_name, user.last_name, department)
+
+
+def rebuild_search_tokens(user):
+    """
+    Replace a user's search tokens with ones computed from their current details
+    """
+    UserSearchToken.objects.filter(user=user).delete()
+    UserSearchToken.objects.bulk_create(
+        [UserSearchToken(user=user, token=token) for token in user_search_tokens(user)],
+        ignore_conflicts=True,
+    )
+
+
+def search_users(query, viewer, limit=10):
+    """
+    Return up to ``limit`` active users the viewer may chat with whose tokens
+    start with every word of the query
+    """
+    terms = sorted(tokenize(query), key=len, reverse=True)[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    
+    users = User.objects.filter(is_active=True).exclude(pk=viewer.pk)
+    if not viewer.profile.is_it_staff:
+        # Regular users can only chat with IT staff
+        users = users.filter(profile__is_it_staff=True)
+    
+    for term in terms:
+        users = users.filter(pk__in=UserSearchToken.objects.filter(token__startswith=term).values('user_id'))
+    
+    return list(users.select_related('profile').order_by('first_name', 'last_name', 'username')[:limit])
+
+
+def _load_it_staff():
+    staff = User.objects.filter(profile__is_it_staff=True, is_active=True).order_by(
+        'first_name', 'last_name', 'username'
+    )
+    return [
+        StaffMember(user.id, user.get_full_name() or user.username, user.email)
+        for user in staff.only('id', 'username', 'first_name', 'last_name', 'email')
+    ]
+
+
+def get_it_staff():
+    """
+    Active IT staff as StaffMember (id, name, email) tuples, ordered by name
+    """
+    return caching.get_or_set('staff', ('directory',), _load_it_staff)
+
+
+def it_staff_ids():
+    return {member.id for member in get_it_staff()}
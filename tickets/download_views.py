@@ -0,0 +1,235 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified, StreamingHttpResponse
+)
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import require_http_methods
+from urllib.parse import quote
+import mimetypes
+import os
+import re
+
+from .models import Attachment, Ticket
+from .thumbnails import ensure_preview
+from .tiering import ensure_local, open_attachment
+from .zipstream import stream_zip, unique_arcname
+
+INLINE_CONTENT_TYPES = {'application/pdf', 'text/plain', 'image/png', 'image/jpeg', 'image/gif'}
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _RangeFile:
+    """
+    Read-only view of ``length`` bytes of an open file starting at ``start``
+
+    fileno() is passed through and the file is positioned at ``start``, so WSGI
+    servers that use sendfile() for FileResponse send the range without copying
+    it through Python; everything else reads it in blocks.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        self.file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _can_download(user, ticket):
+    return user.profile.is_it_staff or ticket.created_by_id == user.id
+
+
+def _attachment_etag(attachment, stat):
+    """
+    Strong ETag from the content hash; files stored before deduplication fall
+    back to a weak one from size and modification time
+    """
+    if attachment.blob_id:
+        return quote_etag(attachment.blob_id)
+    return f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _parse_range(header, size):
+    """
+    Return (start, end) for a single byte range, None to send the whole file,
+    or False if the range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        # Malformed and multi-range requests get the full file
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+@login_required
+@require_http_methods(['GET', 'HEAD'])
+def download_attachment_view(request, attachment_id):
+    """
+    Permission-checked attachment download with ETag and Range support
+    """
+    attachment = get_object_or_404(Attachment.objects.select_related('ticket', 'blob'), id=attachment_id)
+    if not _can_download(request.user, attachment.ticket):
+        return HttpResponseForbidden('You do not have permission to download this file.')
+
+    try:
+        # Cold attachments are restored to hot storage first
+        path = ensure_local(attachment)
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return HttpResponse('File is missing from storage.', status=404)
+
+    etag = _attachment_etag(attachment, stat)
+    cache_control = 'private, max-age=86400' + (', immutable' if attachment.blob_id else '')
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        # Weak comparison, as required for If-None-Match
+        tags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+        if '*' in tags or etag.removeprefix('W/') in tags:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            response['Cache-Control'] = cache_control
+            return response
+
+    content_type = mimetypes.guess_type(attachment.original_filename)[0] or 'application/octet-stream'
+    as_attachment = request.GET.get('download') == '1' or content_type not in INLINE_CONTENT_TYPES
+
+    backend = settings.ATTACHMENT_SENDFILE_BACKEND
+    if backend:
+        # The front server sends the bytes and handles Range itself
+        response = HttpResponse(content_type=content_type)
+        if backend == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = settings.ATTACHMENT_ACCEL_REDIRECT_PREFIX + quote(attachment.file.name)
+        else:
+            response['X-Sendfile'] = path
+        disposition = 'attachment' if as_attachment else 'inline'
+        response['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(attachment.original_filename)}"
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    # If-Range needs a strong match (RFC 9110 13.1.5), so a weak ETag never satisfies it
+    if range_header and (not if_range or (if_range == etag and not etag.startswith('W/'))):
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    file = open(path, 'rb')
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            _RangeFile(file, start, length), status=206, content_type=content_type,
+            as_attachment=as_attachment, filename=attachment.original_filename,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(
+            file, content_type=content_type,
+            as_attachment=as_attachment, filename=attachment.original_filename,
+        )
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+
+@login_required
+@require_http_methods(['GET', 'HEAD'])
+def attachment_preview_view(request, attachment_id, variant):
+    """
+    Small WebP rendition of an image attachment
+    """
+    if variant not in settings.ATTACHMENT_PREVIEW_SIZES:
+        raise Http404('Unknown preview size')
+    
+    attachment = get_object_or_404(Attachment.objects.select_related('ticket'), id=attachment_id)
+    if not _can_download(request.user, attachment.ticket):
+        return HttpResponseForbidden('You do not have permission to view this file.')
+    if not attachment.is_image:
+        raise Http404('Attachment is not an image')
+    
+    etag = quote_etag(f'{attachment.blob_id or attachment.pk}-{variant}')
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    
+    try:
+        path = ensure_preview(attachment, variant)
+        file = open(path, 'rb')
+    except Exception:
+        raise Http404('Preview is not available')
+    
+    response = FileResponse(file, content_type='image/webp')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+@login_required
+@require_http_methods(['GET'])
+def download_all_attachments_view(request, ticket_id):
+    """
+    Stream every attachment on a ticket as one ZIP archive, built on the fly
+    """
+    ticket = get_object_or_404(Ticket, ticket_id=ticket_id)
+    if not _can_download(request.user, ticket):
+        return HttpResponseForbidden('You do not have permission to download these files.')
+    
+    attachments = list(ticket.attachments.select_related('blob').order_by('uploaded_at', 'id'))
+    if not attachments:
+        raise Http404('Ticket has no attachments')
+    
+    used_names = set()
+    entries = []
+    for attachment in attachments:
+        in_cold_tier = attachment.blob_id and attachment.blob.cold_name
+        if not in_cold_tier and not os.path.exists(attachment.file.path):
+            continue
+        uploaded = timezone.localtime(attachment.uploaded_at)
+        entries.append((
+            unique_arcname(attachment.original_filename, used_names),
+            # Cold members are decompressed on the fly rather than rehydrated
+            lambda attachment=attachment: open_attachment(attachment),
+            attachment.file_size,
+            uploaded.timetuple()[:6],
+        ))
+    
+    response = StreamingHttpResponse(stream_zip(entries), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{ticket.ticket_id}-attachments.zip"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
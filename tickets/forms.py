@@ -1,7 +1,41 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Ticket, Comment, Attachment, UserProfile
+from django.conf import settings
+from .directory import get_it_staff
+from .models import Ticket, Comment, Attachment, StorageUsage, UserProfile, format_file_size
+
+ALLOWED_ATTACHMENT_EXTENSIONS = ['.pdf', '.doc', '.docx', '.txt', '.jpg', '.jpeg', '.png', '.gif', '.zip', '.rar']
+
+
+def validate_attachment_name(name):
+    """
+    Raise ValidationError unless the filename has an allowed extension
+    """
+    file_extension = name.lower().split('.')[-1]
+    if f'.{file_extension}' not in ALLOWED_ATTACHMENT_EXTENSIONS:
+        raise forms.ValidationError(f"File type not allowed. Allowed types: {', '.join(ALLOWED_ATTACHMENT_EXTENSIONS)}")
+
+
+def validate_attachment_upload(file):
+    """
+    Raise ValidationError for uploads too large for a single request or of a disallowed type
+    """
+    # Larger files go through the chunked upload API
+    if file.size > settings.ATTACHMENT_MAX_SIZE:
+        raise forms.ValidationError(f"File size cannot exceed {settings.ATTACHMENT_MAX_SIZE // (1024 * 1024)}MB.")
+    validate_attachment_name(file.name)
+
+
+def validate_attachment_quota(ticket, user, size):
+    """
+    Raise ValidationError if ``size`` more bytes would exceed a ticket, user or department quota
+    """
+    scope = StorageUsage.exceeded_quota(ticket, user, size)
+    if scope:
+        owner = {'ticket': 'this ticket', 'user': 'your account', 'department': 'your department'}[scope]
+        limit = format_file_size(settings.ATTACHMENT_STORAGE_QUOTAS[scope])
+        raise forms.ValidationError(f"Upload would exceed the {limit} attachment storage quota for {owner}.")
 
 
 class UserRegistrationForm(UserCreationForm):
@@ -128,23 +162,19 @@ class AttachmentForm(forms.ModelForm):
             }),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, ticket=None, user=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.ticket = ticket
+        self.user = user
         self.fields['file'].help_text = "Upload files (PDF, DOC, images, etc.) - Max 10MB per file"
         self.fields['file'].required = True
 
     def clean_file(self):
         file = self.cleaned_data.get('file')
         if file:
-            # Check file size (10MB limit)
-            if file.size > 10 * 1024 * 1024:
-                raise forms.ValidationError("File size cannot exceed 10MB.")
-            
-            # Check file extension
-            allowed_extensions = ['.pdf', '.doc', '.docx', '.txt', '.jpg', '.jpeg', '.png', '.gif', '.zip', '.rar']
-            file_extension = file.name.lower().split('.')[-1]
-            if f'.{file_extension}' not in allowed_extensions:
-                raise forms.ValidationError(f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}")
+            validate_attachment_upload(file)
+            if self.user is not None:
+                validate_attachment_quota(self.ticket, self.user, file.size)
         
         return file
 
@@ -192,10 +222,12 @@ class TicketStatusUpdateForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Only show IT staff in assigned_to field
-        self.fields['assigned_to'].queryset = User.objects.filter(profile__is_it_staff=True)
+        # Only show IT staff in assigned_to field; choices come from the cached directory
+        staff = get_it_staff()
+        self.fields['assigned_to'].queryset = User.objects.filter(pk__in=[member.id for member in staff])
         self.fields['assigned_to'].required = False
         self.fields['assigned_to'].empty_label = "Unassigned"
+        self.fields['assigned_to'].choices = [('', "Unassigned")] + [(member.id, member.name) for member in staff]
 
 
 class EscalationForm(forms.Form):
@@ -225,6 +257,8 @@ class EscalationForm(forms.Form):
         
         # Set queryset to IT staff excluding current user
         if current_user:
-            self.fields['escalated_to'].queryset = User.objects.filter(
-                profile__is_it_staff=True
-            ).exclude(id=current_user.id)
+            staff = [member for member in get_it_staff() if member.id != current_user.id]
+            self.fields['escalated_to'].queryset = User.objects.filter(pk__in=[member.id for member in staff])
+            self.fields['escalated_to'].choices = (
+                [('', "Select IT staff member")] + [(member.id, member.name) for member in staff]
+            )
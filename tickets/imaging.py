@@ -0,0 +1,45 @@
+"""
+Pillow-only image helpers for attachment previews.
+
+This module runs inside preview worker processes. It deliberately imports
+nothing from Django, so spawned workers start quickly, and it only deals with
+file paths and plain values that pickle cheaply.
+"""
+
+import os
+
+from PIL import Image, ImageOps
+
+WEBP_QUALITY = 80
+
+
+def render_previews(source_path, targets, quality=WEBP_QUALITY):
+    """
+    Write WebP versions of an image scaled to fit each target size
+
+    ``targets`` is a list of ``(dest_path, max_edge)`` pairs. Variants are made
+    largest first and each one is scaled down from the previous one, so the
+    full-size image is only resampled once. Returns ``(dest_path, width, height)``
+    for every file written.
+    """
+    targets = sorted(targets, key=lambda target: target[1], reverse=True)
+    written = []
+    
+    with Image.open(source_path) as image:
+        # Let the JPEG decoder skip detail the largest preview does not need
+        image.draft('RGB', (targets[0][1], targets[0][1]))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        
+        for dest_path, max_edge in targets:
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            # Write beside the target and rename, so readers never see half a file
+            temp_path = f'{dest_path}.{os.getpid()}.tmp'
+            image.save(temp_path, 'WEBP', quality=quality, method=4)
+            os.replace(temp_path, dest_path)
+            written.append((dest_path, image.width, image.height))
+    
+    return written
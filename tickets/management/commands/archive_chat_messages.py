@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+
+from tickets.models import ChatMessage, ArchivedChatMessage
+
+
+class Command(BaseCommand):
+    help = 'Move read chat messages older than the retention window into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.CHAT_ARCHIVE_AFTER_DAYS,
+            help='Archive messages older than this many days',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of messages moved per transaction',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many messages would be archived',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+        
+        # Unread messages stay hot so the unread counters keep matching the table
+        candidates = ChatMessage.objects.filter(timestamp__lt=cutoff, is_read=True)
+        
+        if options['dry_run']:
+            self.stdout.write(f'{candidates.count()} messages older than {cutoff:%Y-%m-%d} would be archived')
+            return
+        
+        total = 0
+        while True:
+            with transaction.atomic():
+                batch = list(candidates.select_for_update().order_by('id')[:batch_size])
+                if not batch:
+                    break
+                
+                ArchivedChatMessage.objects.bulk_create([
+                    ArchivedChatMessage(
+                        id=msg.id,
+                        conversation_id=msg.conversation_id,
+                        sender_id=msg.sender_id,
+                        receiver_id=msg.receiver_id,
+                        message=msg.message,
+                        is_read=msg.is_read,
+                        timestamp=msg.timestamp,
+                    )
+                    for msg in batch
+                ], ignore_conflicts=True)
+                ChatMessage.objects.filter(id__in=[msg.id for msg in batch]).delete()
+            
+            total += len(batch)
+            self.stdout.write(f'Archived {total} messages...')
+        
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} chat messages older than {cutoff:%Y-%m-%d}'))
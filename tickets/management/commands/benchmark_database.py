@@ -0,0 +1,122 @@
+from django.core.management.base import BaseCommand
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from it_support_system.database import SQLITE_PRAGMAS, SQLITE_TIMEOUT
+
+DEFAULT_TIMEOUT = 5  # Django's SQLite default
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent SQLite throughput with the default and the tuned connection settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=4,
+            help='Threads running read-then-write transactions, like saving a ticket',
+        )
+        parser.add_argument(
+            '--readers',
+            type=int,
+            default=4,
+            help='Threads running read-only queries, like dashboard requests',
+        )
+        parser.add_argument(
+            '--seconds',
+            type=float,
+            default=5,
+            help='How long to run each configuration',
+        )
+
+    def handle(self, *args, **options):
+        scratch = tempfile.mkdtemp(prefix='dbbench-')
+        try:
+            for label, tuned in (('default', False), ('tuned', True)):
+                result = self._run(os.path.join(scratch, f'{label}.sqlite3'), tuned, options)
+                self.stdout.write(
+                    f"{label:<8} {result['writes'] / options['seconds']:>8.0f} writes/s "
+                    f"{result['reads'] / options['seconds']:>9.0f} reads/s "
+                    f"{result['locked']:>6} 'database is locked' errors "
+                    f"p95 write {result['p95_ms']:.1f} ms"
+                )
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def _connect(self, path, tuned):
+        conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT if tuned else DEFAULT_TIMEOUT,
+                               isolation_level=None, check_same_thread=False)
+        if tuned:
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+        return conn
+
+    def _run(self, path, tuned, options):
+        setup = self._connect(path, tuned)
+        setup.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, worker INTEGER, payload TEXT)')
+        setup.executemany('INSERT INTO events (worker, payload) VALUES (?, ?)', [(0, 'x' * 200)] * 5000)
+        setup.close()
+
+        lock = threading.Lock()
+        totals = {'writes': 0, 'reads': 0, 'locked': 0}
+        latencies = []
+        deadline = time.monotonic() + options['seconds']
+        begin = 'BEGIN IMMEDIATE' if tuned else 'BEGIN'
+
+        def writer(worker):
+            conn = self._connect(path, tuned)
+            writes = locked = 0
+            timings = []
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                try:
+                    conn.execute(begin)
+                    conn.execute('SELECT COUNT(*) FROM events WHERE worker = ?', (worker,)).fetchone()
+                    conn.execute('INSERT INTO events (worker, payload) VALUES (?, ?)', (worker, 'y' * 200))
+                    conn.execute('COMMIT')
+                    writes += 1
+                    timings.append(time.monotonic() - started)
+                except sqlite3.OperationalError as e:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    if 'locked' not in str(e):
+                        raise
+                    locked += 1
+            conn.close()
+            with lock:
+                totals['writes'] += writes
+                totals['locked'] += locked
+                latencies.extend(timings)
+
+        def reader():
+            conn = self._connect(path, tuned)
+            reads = locked = 0
+            while time.monotonic() < deadline:
+                try:
+                    conn.execute('SELECT worker, COUNT(*) FROM events GROUP BY worker').fetchall()
+                    reads += 1
+                except sqlite3.OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    locked += 1
+            conn.close()
+            with lock:
+                totals['reads'] += reads
+                totals['locked'] += locked
+
+        threads = [threading.Thread(target=writer, args=(n + 1,)) for n in range(options['writers'])]
+        threads += [threading.Thread(target=reader) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        latencies.sort()
+        totals['p95_ms'] = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+        return totals
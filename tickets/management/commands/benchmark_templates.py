@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+import time
+
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = 'Compare page render times per view with and without template fragment caching'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            help='Render pages as this user (default: the first active IT staff member)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Requests per view and configuration',
+        )
+
+    def handle(self, *args, **options):
+        user = self._get_user(options['username'])
+        pages = [('dashboard', reverse('tickets:dashboard'))]
+        if user.profile.is_it_staff:
+            pages.append(('analytics', reverse('tickets:analytics')))
+            ticket = Ticket.objects.order_by('-updated_at').first()
+        else:
+            ticket = Ticket.objects.filter(created_by=user).order_by('-updated_at').first()
+        if ticket is not None:
+            pages.append(('ticket detail', reverse('tickets:ticket_detail', args=[ticket.ticket_id])))
+
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        try:
+            for label, url in pages:
+                without = self._time(client, url, options['requests'], fragment_timeout=0)
+                with_fragments = self._time(client, url, options['requests'], fragment_timeout=300)
+                self.stdout.write(
+                    f"{label:<14} without fragments {without['mean']:>7.1f} ms (p95 {without['p95']:.1f})  "
+                    f"with fragments {with_fragments['mean']:>7.1f} ms (p95 {with_fragments['p95']:.1f})  "
+                    f"{self._change(without['mean'], with_fragments['mean'])}"
+                )
+        finally:
+            client.logout()
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def _get_user(self, username):
+        if username:
+            user = User.objects.select_related('profile').filter(username=username).first()
+            if user is None:
+                raise CommandError(f'No user named {username}')
+            return user
+        user = User.objects.select_related('profile').filter(
+            is_active=True, profile__is_it_staff=True,
+        ).order_by('id').first()
+        if user is None:
+            raise CommandError('No active IT staff member found; pass --username')
+        return user
+
+    def _time(self, client, url, requests, fragment_timeout):
+        timings = []
+        with override_settings(TEMPLATE_FRAGMENT_TIMEOUT=fragment_timeout):
+            # The first request fills the data caches and, when enabled, the fragments
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            for _ in range(requests):
+                started = time.perf_counter()
+                client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            'mean': sum(timings) / len(timings),
+            'p95': timings[min(int(len(timings) * 0.95), len(timings) - 1)],
+        }
+
+    def _change(self, before, after):
+        if not before:
+            return ''
+        return f'{(before - after) / before * 100:.0f}% faster' if after <= before else f'{(after - before) / before * 100:.0f}% slower'
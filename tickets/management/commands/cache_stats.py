@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from tickets.cache_backends import stats
+from tickets.caching import NAMESPACES
+
+TIER_STATS = ('local_hits', 'shared_hits', 'misses')
+
+
+class Command(BaseCommand):
+    help = 'Show cache hit and miss counts per tier and namespace, summed over all workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Zero the counters after printing them',
+        )
+
+    def handle(self, *args, **options):
+        names = list(TIER_STATS)
+        for namespace in NAMESPACES:
+            names += [f'{namespace}:hits', f'{namespace}:misses']
+        totals = stats.totals(names)
+
+        lookups = sum(totals[name] for name in TIER_STATS)
+        self.stdout.write('Tiers:')
+        for name in TIER_STATS:
+            self.stdout.write(f'  {name:<14} {totals[name]:>10}  {self._ratio(totals[name], lookups)}')
+
+        self.stdout.write('Namespaces:')
+        for namespace in NAMESPACES:
+            hits = totals[f'{namespace}:hits']
+            misses = totals[f'{namespace}:misses']
+            self.stdout.write(
+                f'  {namespace:<14} {hits:>10} hits {misses:>10} misses  {self._ratio(hits, hits + misses)}'
+            )
+
+        if options['reset']:
+            stats.reset(names)
+            self.stdout.write(self.style.SUCCESS('Cache statistics reset'))
+
+    def _ratio(self, count, total):
+        return f'{count * 100 / total:5.1f}%' if total else '    -'
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import os
+import time
+
+from tickets.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = 'Remove stale chunked upload sessions and their partial files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=settings.CHUNKED_UPLOAD_EXPIRY_HOURS,
+            help='Remove unfinished uploads with no activity for this many hours',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be removed',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        dry_run = options['dry_run']
+
+        stale = UploadSession.objects.filter(updated_at__lt=cutoff).exclude(status='complete')
+        sessions = 0
+        for session in stale.iterator():
+            if not dry_run:
+                session.discard_part()
+                session.delete()
+            sessions += 1
+
+        # Part files whose session no longer exists, and chunks left by interrupted requests
+        orphans = 0
+        upload_dir = str(settings.CHUNKED_UPLOAD_DIR)
+        if os.path.isdir(upload_dir):
+            known = {f'{pk}.part' for pk in UploadSession.objects.values_list('id', flat=True)}
+            expiry = time.time() - options['hours'] * 3600
+            for entry in os.scandir(upload_dir):
+                orphaned = entry.name.endswith('.chunk') or (entry.name.endswith('.part') and entry.name not in known)
+                if orphaned and entry.stat().st_mtime < expiry:
+                    if not dry_run:
+                        os.remove(entry.path)
+                    orphans += 1
+
+        verb = 'Would remove' if dry_run else 'Removed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {sessions} stale upload sessions and {orphans} orphaned part files'
+        ))
@@ -4,7 +4,7 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 import random
 
-from tickets.models import UserProfile, Ticket, Comment, ChatMessage
+from tickets.models import UserProfile, Ticket, Comment, Conversation
 
 
 class Command(BaseCommand):
@@ -249,9 +249,4 @@ class Command(BaseCommand):
                     sender = user if i % 2 == 0 else staff
                     receiver = staff if i % 2 == 0 else user
                     
-                    ChatMessage.objects.create(
-                        sender=sender,
-                        receiver=receiver,
-                        message=random.choice(chat_messages),
-                        timestamp=timezone.now() - timedelta(hours=random.randint(1, 72))
-                    )
+                    Conversation.send_message(sender, receiver, random.choice(chat_messages))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tickets.models import Attachment, StoredBlob
+from tickets.storage import attachment_storage
+
+
+class Command(BaseCommand):
+    help = 'Move attachments stored before content addressing into shared blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Maximum number of attachments to convert in this run',
+        )
+
+    def handle(self, *args, **options):
+        legacy = Attachment.objects.filter(blob__isnull=True).order_by('id')
+        if options['limit']:
+            legacy = legacy[:options['limit']]
+        
+        converted = 0
+        missing = 0
+        for attachment in legacy.iterator():
+            old_name = attachment.file.name
+            if not old_name or not attachment_storage.exists(old_name):
+                missing += 1
+                continue
+            
+            with attachment_storage.open(old_name) as f:
+                new_name = attachment_storage.save(old_name, f)
+            
+            with transaction.atomic():
+                blob = StoredBlob.acquire(new_name, attachment_storage.size(new_name))
+                Attachment.objects.filter(pk=attachment.pk).update(file=new_name, blob=blob)
+            
+            attachment_storage.delete(old_name)
+            converted += 1
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Converted {converted} attachments to shared blobs ({missing} with missing files skipped)'
+        ))
@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+import os
+import time
+
+from tickets.models import StoredBlob
+from tickets.storage import CAS_PREFIX, attachment_storage, hash_from_name
+from tickets.thumbnails import PREVIEW_DIR
+from tickets.tiering import get_cold_storage
+
+
+class Command(BaseCommand):
+    help = 'Delete attachment blobs that no attachment refers to any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=24,
+            help='Keep unreferenced blobs touched within this many hours',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        grace = timedelta(hours=options['grace_hours'])
+        cutoff = timezone.now() - grace
+        # Uploads that deduplicate against a blob refresh its mtime, so a blob
+        # that is being reused right now is never collected
+        mtime_cutoff = time.time() - grace.total_seconds()
+        dry_run = options['dry_run']
+        
+        deleted = 0
+        freed = 0
+        candidates = StoredBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).values_list('pk', flat=True)
+        for content_hash in list(candidates):
+            with transaction.atomic():
+                blob = StoredBlob.objects.select_for_update().filter(
+                    pk=content_hash, ref_count=0, attachments__isnull=True
+                ).first()
+                if blob is None or self._recently_used(blob.name, mtime_cutoff):
+                    continue
+                if not dry_run:
+                    blob.delete()
+                    transaction.on_commit(
+                        lambda name=blob.name, cold_name=blob.cold_name: self._delete_files(name, cold_name)
+                    )
+            deleted += 1
+            freed += blob.size
+        
+        orphans = self._orphaned_files(mtime_cutoff, dry_run)
+        
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted} unreferenced blobs ({freed} bytes) and {orphans} orphaned files'
+        ))
+
+    def _delete_files(self, name, cold_name=''):
+        """
+        Remove a collected blob, its cold copy and any previews rendered from it
+        """
+        attachment_storage.delete(name)
+        if cold_name:
+            get_cold_storage().delete(cold_name)
+        content_hash = hash_from_name(name)
+        preview_dir = f'{PREVIEW_DIR}/{content_hash[:2]}'
+        if attachment_storage.exists(preview_dir):
+            for filename in attachment_storage.listdir(preview_dir)[1]:
+                if filename.startswith(f'{content_hash}-'):
+                    attachment_storage.delete(f'{preview_dir}/{filename}')
+
+    def _recently_used(self, name, mtime_cutoff):
+        try:
+            return os.path.getmtime(attachment_storage.path(name)) >= mtime_cutoff
+        except FileNotFoundError:
+            return False
+
+    def _orphaned_files(self, mtime_cutoff, dry_run):
+        """
+        Remove blob files without a StoredBlob row and abandoned temporary files
+        """
+        root = attachment_storage.path(CAS_PREFIX)
+        if not os.path.isdir(root):
+            return 0
+        
+        removed = 0
+        for dirpath, dirnames, filenames in os.walk(root):
+            in_tmp = os.path.relpath(dirpath, root).split(os.sep)[0] == 'tmp'
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if os.path.getmtime(path) >= mtime_cutoff:
+                    continue
+                if not in_tmp and StoredBlob.objects.filter(pk=filename).exists():
+                    continue
+                if not dry_run:
+                    os.remove(path)
+                removed += 1
+        return removed
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+import os
+
+from tickets.models import Attachment
+from tickets.thumbnails import preview_name, preview_path, submit_previews
+
+
+class Command(BaseCommand):
+    help = 'Render missing WebP previews for image attachments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render previews that already exist',
+        )
+
+    def handle(self, *args, **options):
+        pending = []
+        seen = set()
+        rendered = 0
+        failed = 0
+        # Keep the pool busy without queueing every image at once
+        window = max(settings.THUMBNAIL_WORKERS, 1) * 4
+        
+        for attachment in Attachment.objects.order_by('id').iterator():
+            if not attachment.is_image:
+                continue
+            # Duplicate uploads share a blob and therefore their previews
+            key = preview_name(attachment, '')
+            if key in seen:
+                continue
+            seen.add(key)
+            
+            if options['force']:
+                for variant in settings.ATTACHMENT_PREVIEW_SIZES:
+                    try:
+                        os.remove(preview_path(attachment, variant))
+                    except FileNotFoundError:
+                        pass
+            
+            try:
+                future = submit_previews(attachment)
+            except Exception as e:
+                self.stderr.write(f'{attachment.original_filename}: {e}')
+                failed += 1
+                continue
+            if future is None:
+                rendered += 1
+                continue
+            
+            pending.append((attachment, future))
+            if len(pending) >= window:
+                ok, errors = self._wait(pending)
+                rendered += ok
+                failed += errors
+                pending = []
+        
+        ok, errors = self._wait(pending)
+        rendered += ok
+        failed += errors
+        self.stdout.write(self.style.SUCCESS(f'Previews ready for {rendered} images ({failed} failed)'))
+
+    def _wait(self, pending):
+        ok = 0
+        errors = 0
+        for attachment, future in pending:
+            try:
+                future.result()
+                ok += 1
+            except Exception as e:
+                self.stderr.write(f'{attachment.original_filename}: {e}')
+                errors += 1
+        return ok, errors
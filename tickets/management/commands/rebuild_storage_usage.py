@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from tickets.models import Attachment, StorageUsage
+
+GROUPINGS = [
+    ('ticket', 'ticket_id', 'ticket__ticket_id'),
+    ('user', 'uploaded_by_id', 'uploaded_by__username'),
+    ('department', 'uploaded_by__profile__department', 'uploaded_by__profile__department'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Recount attachment storage usage per ticket, user and department'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report counters that are out of date',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        rows = []
+        for scope, key_field, label_field in GROUPINGS:
+            totals = Attachment.objects.values(key_field, label_field).annotate(
+                total=Sum('file_size'), files=Count('id'),
+            ).order_by()
+            for row in totals:
+                if row[key_field] in (None, ''):
+                    continue
+                rows.append(StorageUsage(
+                    scope=scope, key=str(row[key_field]), label=row[label_field],
+                    bytes_used=row['total'] or 0, file_count=row['files'],
+                ))
+
+        current = {
+            (usage.scope, usage.key): (usage.bytes_used, usage.file_count)
+            for usage in StorageUsage.objects.all()
+        }
+        expected = {(row.scope, row.key): (row.bytes_used, row.file_count) for row in rows}
+        stale = sum(1 for owner in current.keys() | expected.keys() if current.get(owner) != expected.get(owner))
+
+        if not dry_run:
+            with transaction.atomic():
+                StorageUsage.objects.all().delete()
+                StorageUsage.objects.bulk_create(rows, batch_size=1000)
+
+        verb = 'Would correct' if dry_run else 'Corrected'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {stale} of {len(rows)} storage usage counters'
+        ))
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import time
+
+from tickets.tiering import cold_candidates, demote_blob
+
+
+class Command(BaseCommand):
+    help = 'Move attachments of long-closed tickets to cold storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ATTACHMENT_COLD_AFTER_DAYS,
+            help='Demote blobs whose tickets were all resolved or closed this many days ago',
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=24,
+            help='Keep blobs that an upload reused within this many hours',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Demote at most this many blobs in one run',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be moved',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        min_mtime = time.time() - options['grace_hours'] * 3600
+        dry_run = options['dry_run']
+
+        candidates = cold_candidates(cutoff).order_by('created_at')
+        if options['limit']:
+            candidates = candidates[:options['limit']]
+
+        moved = 0
+        moved_bytes = 0
+        failed = 0
+        for blob in list(candidates):
+            if dry_run:
+                moved += 1
+                moved_bytes += blob.size
+                continue
+            try:
+                if not demote_blob(blob, cutoff, min_mtime):
+                    continue
+            except Exception as e:
+                self.stderr.write(f'Failed to move blob {blob.content_hash} to cold storage: {e}')
+                failed += 1
+                continue
+            moved += 1
+            moved_bytes += blob.size
+
+        verb = 'Would move' if dry_run else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {moved} blobs ({moved_bytes} bytes) to cold storage, {failed} failed'
+        ))
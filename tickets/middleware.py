@@ -0,0 +1,37 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from . import presence
+
+
+class PresenceMiddleware:
+    """
+    Record a presence heartbeat for every request made by a signed-in user
+
+    Runs natively in both sync and async chains, so async views under ASGI
+    are not switched to a thread for it. Only a heartbeat that is due touches
+    the cache; the throttle check itself is an in-memory lookup.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            presence.heartbeat(user.id)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if hasattr(request, 'auser'):
+            user = await request.auser()
+            if user.is_authenticated and presence.heartbeat_due(user.id):
+                await sync_to_async(presence.heartbeat)(user.id)
+        return await self.get_response(request)
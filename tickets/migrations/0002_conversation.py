@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_conversations(apps, schema_editor):
+    """
+    Group existing chat messages into conversations and compute their summaries
+    """
+    ChatMessage = apps.get_model('tickets', 'ChatMessage')
+    Conversation = apps.get_model('tickets', 'Conversation')
+
+    pairs = ChatMessage.objects.values_list('sender_id', 'receiver_id').distinct()
+    for low, high in {tuple(sorted(pair)) for pair in pairs}:
+        conversation, _ = Conversation.objects.get_or_create(user_low_id=low, user_high_id=high)
+        messages = ChatMessage.objects.filter(
+            models.Q(sender_id=low, receiver_id=high) | models.Q(sender_id=high, receiver_id=low)
+        )
+        messages.update(conversation=conversation)
+
+        last = messages.order_by('-timestamp', '-id').first()
+        conversation.last_message = last
+        conversation.last_message_sender_id = last.sender_id
+        conversation.last_message_preview = last.message[:200]
+        conversation.last_message_at = last.timestamp
+        conversation.user_low_unread = messages.filter(receiver_id=low, is_read=False).count()
+        conversation.user_high_unread = messages.filter(receiver_id=high, is_read=False).count()
+        conversation.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_preview', models.CharField(blank=True, max_length=200)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('user_low_unread', models.PositiveIntegerField(default=0, help_text='Unread messages for user_low')),
+                ('user_high_unread', models.PositiveIntegerField(default=0, help_text='Unread messages for user_high')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tickets.chatmessage')),
+                ('last_message_sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_high', to=settings.AUTH_USER_MODEL)),
+                ('user_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_low', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Chat Conversation',
+                'verbose_name_plural': 'Chat Conversations',
+                'ordering': ['-last_message_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='tickets.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_low', '-last_message_at'], name='conversation_low_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_high', '-last_message_at'], name='conversation_high_recent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('user_low', 'user_high'), name='unique_conversation_participants'),
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_conversation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedChatMessage',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Primary key of the original chat message', primary_key=True, serialize=False)),
+                ('message', models.TextField()),
+                ('is_read', models.BooleanField(default=True)),
+                ('timestamp', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='tickets.conversation')),
+                ('receiver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Chat Message',
+                'verbose_name_plural': 'Archived Chat Messages',
+                'ordering': ['timestamp'],
+                'indexes': [models.Index(fields=['conversation', 'id'], name='archived_message_history_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_search_tokens(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    UserProfile = apps.get_model('tickets', 'UserProfile')
+    UserSearchToken = apps.get_model('tickets', 'UserSearchToken')
+    departments = dict(UserProfile.objects.values_list('user_id', 'department'))
+    
+    tokens = []
+    for user in User.objects.only('id', 'username', 'first_name', 'last_name'):
+        words = set()
+        for value in (user.username, user.first_name, user.last_name, departments.get(user.id)):
+            words.update(word[:100] for word in (value or '').lower().split())
+        tokens.extend(UserSearchToken(user_id=user.id, token=word) for word in words)
+    UserSearchToken.objects.bulk_create(tokens, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0004_chat_message_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=100)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Search Token',
+                'verbose_name_plural': 'User Search Tokens',
+                'constraints': [models.UniqueConstraint(fields=('user', 'token'), name='unique_user_search_token')],
+            },
+        ),
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
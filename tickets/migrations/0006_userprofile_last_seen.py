@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_usersearchtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, help_text='Last request seen from this user, written in batches', null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:18
+
+import django.db.models.deletion
+import tickets.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0007_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('content_hash', models.CharField(help_text='SHA-256 of the file contents', max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Path in attachment storage', max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='File size in bytes')),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Attachments using this blob')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Stored Blob',
+                'verbose_name_plural': 'Stored Blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='attachment',
+            name='file',
+            field=models.FileField(help_text='Upload file attachment', storage=tickets.storage.get_attachment_storage, upload_to='ticket_attachments/%Y/%m/%d/'),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attachments', to='tickets.storedblob'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_content_addressed_attachments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedblob',
+            name='cold_name',
+            field=models.CharField(blank=True, help_text='Compressed copy in cold storage', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='storedblob',
+            name='storage_tier',
+            field=models.CharField(choices=[('hot', 'Hot'), ('cold', 'Cold')], default='hot', max_length=10),
+        ),
+    ]
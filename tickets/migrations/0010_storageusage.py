@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:28
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_storage_usage(apps, schema_editor):
+    Attachment = apps.get_model('tickets', 'Attachment')
+    StorageUsage = apps.get_model('tickets', 'StorageUsage')
+    groupings = [
+        ('ticket', 'ticket_id', 'ticket__ticket_id'),
+        ('user', 'uploaded_by_id', 'uploaded_by__username'),
+        ('department', 'uploaded_by__profile__department', 'uploaded_by__profile__department'),
+    ]
+    
+    rows = []
+    for scope, key_field, label_field in groupings:
+        totals = Attachment.objects.values(key_field, label_field).annotate(
+            total=Sum('file_size'), files=Count('id'),
+        ).order_by()
+        for row in totals:
+            if row[key_field] in (None, ''):
+                continue
+            rows.append(StorageUsage(
+                scope=scope, key=str(row[key_field]), label=row[label_field],
+                bytes_used=row['total'] or 0, file_count=row['files'],
+            ))
+    StorageUsage.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_storedblob_storage_tier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('ticket', 'Ticket'), ('user', 'User'), ('department', 'Department')], max_length=20)),
+                ('key', models.CharField(help_text='Ticket or user primary key, or department name', max_length=150)),
+                ('label', models.CharField(help_text='Ticket ID, username or department name', max_length=150)),
+                ('bytes_used', models.PositiveBigIntegerField(default=0)),
+                ('file_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Storage Usage',
+                'verbose_name_plural': 'Storage Usage',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='unique_storage_usage_owner')],
+            },
+        ),
+        migrations.RunPython(backfill_storage_usage, migrations.RunPython.noop),
+    ]
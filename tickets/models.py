@@ -1,10 +1,27 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 import os
+import uuid
+
+from .storage import get_attachment_storage, hash_from_name
+
+
+def format_file_size(size):
+    """
+    Return a byte count as a human-readable size
+    """
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} TB"
 
 
 class UserProfile(models.Model):
@@ -16,6 +33,7 @@ class UserProfile(models.Model):
     department = models.CharField(max_length=100, blank=True, null=True, help_text="User's department")
     is_it_staff = models.BooleanField(default=False, help_text="Whether user is IT staff member")
     phone_number = models.CharField(max_length=20, blank=True, null=True)
+    last_seen = models.DateTimeField(blank=True, null=True, help_text="Last request seen from this user, written in batches")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -27,6 +45,24 @@ class UserProfile(models.Model):
         verbose_name_plural = "User Profiles"
 
 
+class UserSearchToken(models.Model):
+    """
+    Lowercased name and department words used for prefix search of the user directory
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=100, db_index=True)
+
+    def __str__(self):
+        return f"{self.token} -> {self.user.username}"
+
+    class Meta:
+        verbose_name = "User Search Token"
+        verbose_name_plural = "User Search Tokens"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'token'], name='unique_user_search_token'),
+        ]
+
+
 class Ticket(models.Model):
     """
     Main ticket model for IT support requests
@@ -240,14 +276,95 @@ class Comment(models.Model):
         verbose_name_plural = "Ticket Comments"
 
 
+class StoredBlob(models.Model):
+    """
+    A unique file in content-addressed attachment storage
+    
+    Every Attachment with the same contents points at one blob; ref_count tracks
+    how many do, and gc_attachment_blobs removes blobs nothing refers to.
+    """
+    TIER_CHOICES = [
+        ('hot', 'Hot'),
+        ('cold', 'Cold'),
+    ]
+
+    content_hash = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 of the file contents")
+    name = models.CharField(max_length=255, help_text="Path in attachment storage")
+    size = models.PositiveBigIntegerField(help_text="File size in bytes")
+    ref_count = models.PositiveIntegerField(default=0, help_text="Attachments using this blob")
+    storage_tier = models.CharField(max_length=10, choices=TIER_CHOICES, default='hot')
+    cold_name = models.CharField(max_length=255, blank=True, help_text="Compressed copy in cold storage")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.ref_count} refs)"
+
+    @classmethod
+    def acquire(cls, name, size):
+        """
+        Add a reference to the blob stored under ``name``, creating its row if needed
+        """
+        content_hash = hash_from_name(name)
+        if content_hash is None:
+            return None
+        blob, _ = cls.objects.get_or_create(content_hash=content_hash, defaults={'name': name, 'size': size})
+        # The file was just written to (or found in) hot storage
+        cls.objects.filter(pk=content_hash).update(
+            ref_count=F('ref_count') + 1, storage_tier='hot', updated_at=timezone.now()
+        )
+        return blob
+
+    @classmethod
+    def acquire_many(cls, stored):
+        """
+        Add one reference per ``(name, size)`` pair using a fixed number of queries
+        """
+        counts = Counter()
+        details = {}
+        for name, size in stored:
+            content_hash = hash_from_name(name)
+            if content_hash:
+                counts[content_hash] += 1
+                details[content_hash] = (name, size)
+        
+        cls.objects.bulk_create(
+            [cls(content_hash=h, name=details[h][0], size=details[h][1]) for h in counts],
+            ignore_conflicts=True,
+        )
+        hashes_by_count = defaultdict(list)
+        for content_hash, count in counts.items():
+            hashes_by_count[count].append(content_hash)
+        now = timezone.now()
+        for count, hashes in hashes_by_count.items():
+            cls.objects.filter(pk__in=hashes).update(
+                ref_count=F('ref_count') + count, storage_tier='hot', updated_at=now
+            )
+
+    @classmethod
+    def release(cls, content_hash):
+        """
+        Drop a reference; the file stays until garbage collection finds it unused
+        """
+        if content_hash:
+            cls.objects.filter(pk=content_hash, ref_count__gt=0).update(
+                ref_count=F('ref_count') - 1, updated_at=timezone.now()
+            )
+
+    class Meta:
+        verbose_name = "Stored Blob"
+        verbose_name_plural = "Stored Blobs"
+
+
 class Attachment(models.Model):
     """
     File attachments for tickets
     """
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='ticket_attachments/%Y/%m/%d/', help_text="Upload file attachment")
+    file = models.FileField(upload_to='ticket_attachments/%Y/%m/%d/', storage=get_attachment_storage, help_text="Upload file attachment")
+    blob = models.ForeignKey(StoredBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='attachments')
     original_filename = models.CharField(max_length=255, help_text="Original filename")
-    file_size = models.PositiveIntegerField(help_text="File size in bytes")
+    file_size = models.PositiveBigIntegerField(help_text="File size in bytes")
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploaded_attachments')
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
@@ -256,23 +373,38 @@ class Attachment(models.Model):
 
     def save(self, *args, **kwargs):
         """
-        Store original filename and file size
+        Store original filename and file size, and link a new file to its shared blob
         """
-        if self.file:
-            self.original_filename = os.path.basename(self.file.name)
-            self.file_size = self.file.size
-        super().save(*args, **kwargs)
+        if not self.file or self.file._committed:
+            super().save(*args, **kwargs)
+            return
+        
+        self.original_filename = os.path.basename(self.file.name)
+        self.file_size = self.file.size
+        previous = None
+        if self.pk:
+            previous = Attachment.objects.filter(pk=self.pk).values_list('blob_id', 'file_size').first()
+        
+        with transaction.atomic():
+            # Write the file first so its content hash is known
+            self.file.save(self.file.name, self.file.file, save=False)
+            self.blob = StoredBlob.acquire(self.file.name, self.file_size)
+            super().save(*args, **kwargs)
+            if previous:
+                # A replaced file gives up this attachment's reference to the old blob
+                previous_blob_id, previous_size = previous
+                StoredBlob.release(previous_blob_id)
+                StorageUsage.record(self.ticket, self.uploaded_by, self.file_size - previous_size, count=0)
+
+    @property
+    def is_image(self):
+        return os.path.splitext(self.original_filename)[1].lower() in ('.png', '.jpg', '.jpeg', '.gif')
 
     def get_file_size_display(self):
         """
         Return human-readable file size
         """
-        size = self.file_size
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} TB"
+        return format_file_size(self.file_size)
 
     class Meta:
         ordering = ['-uploaded_at']
@@ -280,10 +412,275 @@ class Attachment(models.Model):
         verbose_name_plural = "Ticket Attachments"
 
 
+class StorageUsage(models.Model):
+    """
+    Running total of attachment bytes per ticket, uploader and department
+    
+    Counters are adjusted as attachments are created and deleted, so quota checks
+    and the admin report read a few rows instead of summing Attachment.file_size.
+    Sizes are logical: a deduplicated file counts for every attachment using it.
+    Uploads are counted against the uploader's department at upload time; run
+    rebuild_storage_usage to recount after people move between departments.
+    """
+    SCOPE_CHOICES = [
+        ('ticket', 'Ticket'),
+        ('user', 'User'),
+        ('department', 'Department'),
+    ]
+
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    key = models.CharField(max_length=150, help_text="Ticket or user primary key, or department name")
+    label = models.CharField(max_length=150, help_text="Ticket ID, username or department name")
+    bytes_used = models.PositiveBigIntegerField(default=0)
+    file_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_scope_display()} {self.label}: {self.get_size_display()}"
+
+    def get_size_display(self):
+        return format_file_size(self.bytes_used)
+
+    def get_quota_display(self):
+        """
+        Share of the scope's quota in use, or 'Unlimited'
+        """
+        limit = settings.ATTACHMENT_STORAGE_QUOTAS.get(self.scope)
+        if not limit:
+            return 'Unlimited'
+        return f"{self.bytes_used * 100 / limit:.1f}% of {format_file_size(limit)}"
+
+    @staticmethod
+    def owners(ticket, user):
+        """
+        ``(scope, key, label)`` for every counter an attachment on ``ticket`` by ``user`` affects
+
+        ``ticket`` may be None for a ticket that is not saved yet.
+        """
+        owners = [('user', str(user.pk), user.username)]
+        if ticket is not None:
+            owners.append(('ticket', str(ticket.pk), ticket.ticket_id))
+        try:
+            department = user.profile.department
+        except UserProfile.DoesNotExist:
+            department = ''
+        if department:
+            owners.append(('department', department, department))
+        return owners
+
+    @classmethod
+    def record(cls, ticket, user, size, count=1):
+        """
+        Add ``size`` bytes and ``count`` files to the counters; negative values remove them
+        """
+        owners = cls.owners(ticket, user)
+        if size > 0 or count > 0:
+            cls.objects.bulk_create(
+                [cls(scope=scope, key=key, label=label) for scope, key, label in owners],
+                ignore_conflicts=True,
+            )
+        match = Q()
+        for scope, key, _ in owners:
+            match |= Q(scope=scope, key=key)
+        cls.objects.filter(match).update(
+            bytes_used=Greatest(F('bytes_used') + size, 0),
+            file_count=Greatest(F('file_count') + count, 0),
+            updated_at=timezone.now(),
+        )
+
+    @classmethod
+    def exceeded_quota(cls, ticket, user, size):
+        """
+        Return the scope whose quota ``size`` more bytes would exceed, or None
+        """
+        quotas = settings.ATTACHMENT_STORAGE_QUOTAS
+        owners = cls.owners(ticket, user)
+        match = Q()
+        for scope, key, _ in owners:
+            match |= Q(scope=scope, key=key)
+        used = {
+            (scope, key): bytes_used
+            for scope, key, bytes_used in cls.objects.filter(match).values_list('scope', 'key', 'bytes_used')
+        }
+        for scope, key, _ in owners:
+            limit = quotas.get(scope)
+            if limit is not None and used.get((scope, key), 0) + size > limit:
+                return scope
+        return None
+
+    class Meta:
+        verbose_name = "Storage Usage"
+        verbose_name_plural = "Storage Usage"
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_storage_usage_owner'),
+        ]
+
+
+class UploadSession(models.Model):
+    """
+    In-progress chunked upload, assembled into an Attachment once every byte has arrived
+    
+    Chunks are appended to a ``.part`` file in CHUNKED_UPLOAD_DIR and the CRC32 of
+    everything received so far is kept so clients can verify and resume.
+    """
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+        ('aborted', 'Aborted'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='upload_sessions')
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField(help_text="Expected file size in bytes")
+    received_size = models.PositiveBigIntegerField(default=0, help_text="Bytes written so far")
+    checksum = models.PositiveBigIntegerField(default=0, help_text="CRC32 of the bytes received so far")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    attachment = models.ForeignKey('Attachment', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_size}/{self.total_size}) - {self.ticket.ticket_id}"
+
+    @property
+    def part_path(self):
+        return os.path.join(str(settings.CHUNKED_UPLOAD_DIR), f'{self.id}.part')
+
+    @property
+    def is_finished(self):
+        return self.received_size == self.total_size
+
+    def discard_part(self):
+        """
+        Remove the partially uploaded data from disk
+        """
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Upload Session"
+        verbose_name_plural = "Upload Sessions"
+
+
+class Conversation(models.Model):
+    """
+    Chat conversation between two users with a denormalized summary for the sidebar
+    
+    Participants are stored in id order so each pair maps to exactly one row.
+    """
+    user_low = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_low')
+    user_high = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_high')
+    last_message = models.ForeignKey('ChatMessage', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_preview = models.CharField(max_length=200, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    user_low_unread = models.PositiveIntegerField(default=0, help_text="Unread messages for user_low")
+    user_high_unread = models.PositiveIntegerField(default=0, help_text="Unread messages for user_high")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Conversation between {self.user_low.username} and {self.user_high.username}"
+
+    @classmethod
+    def for_users(cls, user_a, user_b):
+        """
+        Get or create the conversation between two users
+        """
+        low, high = sorted([user_a, user_b], key=lambda u: u.pk)
+        conversation, _ = cls.objects.get_or_create(user_low=low, user_high=high)
+        return conversation
+
+    @classmethod
+    def between(cls, user_a, user_b):
+        """
+        Return the conversation between two users, or None if they never chatted
+        """
+        low, high = sorted([user_a.pk, user_b.pk])
+        return cls.objects.filter(user_low_id=low, user_high_id=high).first()
+
+    @classmethod
+    def involving(cls, user):
+        """
+        Conversations the user takes part in, most recently active first
+        """
+        return cls.objects.filter(Q(user_low=user) | Q(user_high=user)).order_by('-last_message_at')
+
+    @classmethod
+    def send_message(cls, sender, receiver, text):
+        """
+        Create a chat message and update the conversation summary atomically
+        """
+        with transaction.atomic():
+            conversation = cls.for_users(sender, receiver)
+            message = ChatMessage.objects.create(
+                conversation=conversation,
+                sender=sender,
+                receiver=receiver,
+                message=text
+            )
+            unread_field = conversation._unread_field(receiver)
+            cls.objects.filter(pk=conversation.pk).update(**{
+                'last_message': message,
+                'last_message_sender': sender,
+                'last_message_preview': text[:200],
+                'last_message_at': message.timestamp,
+                unread_field: F(unread_field) + 1,
+            })
+        return message
+
+    def mark_read(self, reader):
+        """
+        Mark the reader's incoming messages read and lower their unread counter
+        
+        Returns the number of messages that were marked read. Polls that find
+        nothing unread only read, so they never take the write lock.
+        """
+        unread = ChatMessage.objects.filter(conversation=self, receiver=reader, is_read=False)
+        if not unread.exists():
+            return 0
+        with transaction.atomic():
+            marked = unread.update(is_read=True)
+            if marked:
+                # Decrement rather than reset, so messages sent meanwhile stay counted
+                unread_field = self._unread_field(reader)
+                Conversation.objects.filter(pk=self.pk, **{f'{unread_field}__gt': 0}).update(
+                    **{unread_field: Greatest(F(unread_field) - marked, 0)}
+                )
+        return marked
+
+    def _unread_field(self, user):
+        return 'user_low_unread' if user.pk == self.user_low_id else 'user_high_unread'
+
+    def other_participant(self, user):
+        return self.user_high if user.pk == self.user_low_id else self.user_low
+
+    def unread_for(self, user):
+        return getattr(self, self._unread_field(user))
+
+    class Meta:
+        ordering = ['-last_message_at']
+        verbose_name = "Chat Conversation"
+        verbose_name_plural = "Chat Conversations"
+        constraints = [
+            models.UniqueConstraint(fields=['user_low', 'user_high'], name='unique_conversation_participants'),
+        ]
+        indexes = [
+            models.Index(fields=['user_low', '-last_message_at'], name='conversation_low_recent_idx'),
+            models.Index(fields=['user_high', '-last_message_at'], name='conversation_high_recent_idx'),
+        ]
+
+
 class ChatMessage(models.Model):
     """
     Chat messages between users and staff
     """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, blank=True,
+                                     related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages')
     message = models.TextField(help_text="Chat message content")
@@ -297,6 +694,37 @@ class ChatMessage(models.Model):
         ordering = ['timestamp']
         verbose_name = "Chat Message"
         verbose_name_plural = "Chat Messages"
+        indexes = [
+            models.Index(fields=['conversation', 'timestamp', 'id'], name='chat_message_history_idx'),
+        ]
+
+
+class ArchivedChatMessage(models.Model):
+    """
+    Chat messages moved out of the hot ChatMessage table by archive_chat_messages
+    
+    Rows keep the primary key of the original message so history cursors keep working.
+    """
+    id = models.BigIntegerField(primary_key=True, help_text="Primary key of the original chat message")
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, blank=True,
+                                     related_name='archived_messages')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    message = models.TextField()
+    is_read = models.BooleanField(default=True)
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived message from {self.sender.username} to {self.receiver.username}"
+
+    class Meta:
+        ordering = ['timestamp']
+        verbose_name = "Archived Chat Message"
+        verbose_name_plural = "Archived Chat Messages"
+        indexes = [
+            models.Index(fields=['conversation', 'id'], name='archived_message_history_idx'),
+        ]
 
 
 class TicketNotification(models.Model):
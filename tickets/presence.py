@@ -0,0 +1,126 @@
+"""
+Online presence kept in the cache.
+
+Each request from a signed-in user refreshes a heartbeat key that expires
+after ``PRESENCE_TIMEOUT`` seconds, so a user is online while their key
+exists. Heartbeats are throttled per worker, and the matching
+``UserProfile.last_seen`` values are buffered in memory and written in one
+batch every ``PRESENCE_FLUSH_INTERVAL`` seconds instead of on every request.
+Throttle entries older than the heartbeat interval are dropped at each flush,
+so the worker only remembers recently active users.
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+PRESENCE_KEY = 'presence:user:{}'
+
+_lock = threading.Lock()
+_last_heartbeat = {}
+_pending_last_seen = {}
+_last_flush = time.monotonic()
+
+
+def _key(user_id):
+    return PRESENCE_KEY.format(user_id)
+
+
+def heartbeat_due(user_id):
+    """
+    Whether heartbeat() would write for this user; a lock-free in-memory check
+    """
+    last = _last_heartbeat.get(user_id)
+    return last is None or time.monotonic() - last >= settings.PRESENCE_HEARTBEAT_INTERVAL
+
+
+def _evict_stale_heartbeats(now):
+    # Entries past the interval no longer throttle anything
+    cutoff = now - settings.PRESENCE_HEARTBEAT_INTERVAL
+    for user_id in [user_id for user_id, last in _last_heartbeat.items() if last <= cutoff]:
+        del _last_heartbeat[user_id]
+
+
+def heartbeat(user_id):
+    """
+    Mark a user as online, at most once per heartbeat interval in this worker
+    """
+    now = time.monotonic()
+    with _lock:
+        last = _last_heartbeat.get(user_id)
+        if last is not None and now - last < settings.PRESENCE_HEARTBEAT_INTERVAL:
+            return
+        _last_heartbeat[user_id] = now
+        seen = time.time()
+        _pending_last_seen[user_id] = seen
+        flush_due = now - _last_flush >= settings.PRESENCE_FLUSH_INTERVAL
+        if flush_due:
+            _evict_stale_heartbeats(now)
+    
+    cache.set(_key(user_id), seen, settings.PRESENCE_TIMEOUT)
+    if flush_due:
+        flush_last_seen()
+
+
+def clear(user_id):
+    """
+    Mark a user as offline straight away (used on logout)
+    """
+    with _lock:
+        _last_heartbeat.pop(user_id, None)
+    cache.delete(_key(user_id))
+
+
+def get_presence(user_ids):
+    """
+    Map each user id to the datetime of their last heartbeat, or None if offline
+    """
+    user_ids = list(user_ids)
+    found = cache.get_many([_key(user_id) for user_id in user_ids])
+    presence = {}
+    for user_id in user_ids:
+        seen = found.get(_key(user_id))
+        presence[user_id] = datetime.fromtimestamp(seen, tz=dt_timezone.utc) if seen else None
+    return presence
+
+
+def online_user_ids(user_ids):
+    return {user_id for user_id, seen in get_presence(user_ids).items() if seen}
+
+
+def is_online(user_id):
+    return cache.get(_key(user_id)) is not None
+
+
+def flush_last_seen():
+    """
+    Write buffered last-seen times to UserProfile in a single bulk update
+    """
+    global _last_flush
+    with _lock:
+        pending = dict(_pending_last_seen)
+        _pending_last_seen.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+    
+    from .models import UserProfile
+    
+    profiles = list(UserProfile.objects.filter(user_id__in=pending).only('id', 'user_id'))
+    for profile in profiles:
+        profile.last_seen = datetime.fromtimestamp(pending[profile.user_id], tz=dt_timezone.utc)
+    UserProfile.objects.bulk_update(profiles, ['last_seen'], batch_size=500)
+    return len(profiles)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush_last_seen()
+    except Exception:
+        # The database may already be unavailable while the worker shuts down
+        pass
@@ -0,0 +1,164 @@
+"""
+Session engine that reads through the cache and writes to the database behind it.
+
+Like Django's cached_db engine, sessions are read from the cache and only
+fall back to the django_session table on a miss. Changes to an existing
+session go to the cache straight away. The database copy is updated in
+batches, at most SESSION_WRITE_BEHIND_INTERVAL seconds later, so a flash
+message or a preference change no longer costs a database write on the
+request that made it.
+
+New sessions (login, key rotation) are still inserted immediately, because
+the database is what guarantees a new key is unique. Batched writes only
+ever update existing rows, so a session that was deleted in the meantime
+(logout) is never brought back.
+
+Each worker process runs a background thread that flushes its buffer once
+the interval has passed, so changes reach the database even if the worker
+gets no further requests. The buffer is also flushed at a normal exit. A
+worker that is killed outright (SIGKILL, out of memory) loses up to
+SESSION_WRITE_BEHIND_INTERVAL seconds of changes from the database copy;
+they survive only while the cache still holds the session.
+
+Use it with ``SESSION_ENGINE = 'tickets.session_store'``.
+"""
+
+import atexit
+import os
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.db import connections, transaction
+from django.utils import timezone
+
+_lock = threading.Lock()
+_pending = {}
+_last_flush = time.monotonic()
+_flusher_pid = None
+
+
+def _queue(session):
+    _start_flusher()
+    with _lock:
+        _pending[session.session_key] = session
+        flush_due = time.monotonic() - _last_flush >= settings.SESSION_WRITE_BEHIND_INTERVAL
+    if flush_due:
+        flush_sessions()
+
+
+def _start_flusher():
+    """
+    Start this process's background flush thread if it is not running yet
+    """
+    global _flusher_pid
+    # Threads do not survive fork(), so a pre-forked worker starts its own
+    if _flusher_pid == os.getpid():
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_periodically, name='session-write-behind', daemon=True).start()
+
+
+def _flush_periodically():
+    while True:
+        with _lock:
+            wait = _last_flush + settings.SESSION_WRITE_BEHIND_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+            continue
+        try:
+            flush_sessions()
+        except Exception as e:
+            print(f"Failed to write buffered sessions: {e}")
+        finally:
+            # The thread's connection would otherwise stay open between flushes
+            connections.close_all()
+
+
+def _pending_session(session_key):
+    with _lock:
+        return _pending.get(session_key)
+
+
+def _discard(session_key):
+    with _lock:
+        _pending.pop(session_key, None)
+
+
+def flush_sessions():
+    """
+    Write buffered session changes to the database; returns the number of rows updated
+    """
+    global _last_flush
+    with _lock:
+        pending = list(_pending.values())
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+
+    updated = 0
+    model = SessionStore.get_model_class()
+    with transaction.atomic():
+        for session in pending:
+            updated += model.objects.filter(session_key=session.session_key).update(
+                session_data=session.session_data, expire_date=session.expire_date,
+            )
+    return updated
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush_sessions()
+    except Exception:
+        # The database may already be unavailable while the worker shuts down
+        pass
+
+
+class SessionStore(CachedDBStore):
+    """
+    Cached database sessions with write-behind for changes to existing sessions
+    """
+
+    def load(self):
+        pending = _pending_session(self.session_key) if self.session_key else None
+        if pending is None:
+            return super().load()
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            data = None
+        if data is None and pending.expire_date > timezone.now():
+            # Evicted from the cache before this worker wrote it to the database
+            data = self.decode(pending.session_data)
+        return data if data is not None else super().load()
+
+    def save(self, must_create=False):
+        if self.session_key is None or must_create:
+            return super().save(must_create)
+
+        data = self._get_session()
+        row = self.create_model_instance(data)
+        try:
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
+        except Exception:
+            # Without the cache copy the change must reach the database now
+            return super().save()
+        _queue(row)
+
+    async def asave(self, must_create=False):
+        await sync_to_async(self.save)(must_create)
+
+    def delete(self, session_key=None):
+        _discard(session_key or self.session_key)
+        super().delete(session_key)
+
+    async def adelete(self, session_key=None):
+        _discard(session_key or self.session_key)
+        await super().adelete(session_key)
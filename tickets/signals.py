@@ -0,0 +1,129 @@
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, presence
+from .backends import invalidate_profile
+from .directory import rebuild_search_tokens
+from .models import Attachment, Comment, StorageUsage, StoredBlob, Ticket, UserProfile
+from .thumbnails import schedule_previews
+
+
+@receiver(post_save, sender=User)
+def refresh_user_search_tokens(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the user directory in sync with name changes (logins only touch last_login)
+    """
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    rebuild_search_tokens(instance)
+
+
+@receiver(post_save, sender=UserProfile)
+def refresh_profile_search_tokens(sender, instance, **kwargs):
+    """
+    Department words are searchable too
+    """
+    rebuild_search_tokens(instance.user)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    """
+    Make the next request load the changed profile from the database
+    """
+    invalidate_profile(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_staff_cache(sender, instance, update_fields=None, **kwargs):
+    """
+    Cached staff lists change with names and IT staff flags (logins only touch last_login)
+    """
+    if update_fields and set(update_fields) <= {'last_login', 'last_seen'}:
+        return
+    caching.invalidate('staff')
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def invalidate_ticket_caches(sender, instance, **kwargs):
+    """
+    Dashboard counts, analytics and the calendar are all derived from tickets
+    """
+    caching.invalidate('dashboard', 'analytics', 'calendar', caching.ticket_namespace(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def invalidate_ticket_fragments(sender, instance, **kwargs):
+    """
+    The ticket page caches its comment and attachment lists
+    """
+    caching.invalidate(caching.ticket_namespace(instance.ticket_id))
+
+
+@receiver(user_logged_out)
+def clear_presence_on_logout(sender, user, **kwargs):
+    """
+    Show the user as offline without waiting for the heartbeat to expire
+    """
+    if user is not None:
+        presence.clear(user.id)
+
+
+@receiver(post_save, sender=Attachment)
+def render_attachment_previews(sender, instance, created, **kwargs):
+    """
+    Queue WebP previews for new image attachments
+    """
+    if created:
+        schedule_previews(instance)
+
+
+@receiver(post_save, sender=Attachment)
+def count_attachment_storage(sender, instance, created, **kwargs):
+    """
+    Add new attachments to the ticket, uploader and department usage counters
+    """
+    if created:
+        StorageUsage.record(instance.ticket, instance.uploaded_by, instance.file_size)
+
+
+@receiver(post_delete, sender=Attachment)
+def release_attachment_blob(sender, instance, **kwargs):
+    """
+    Deleted attachments (including ones removed with their ticket) drop their blob reference
+    """
+    StoredBlob.release(instance.blob_id)
+
+
+@receiver(post_delete, sender=Attachment)
+def uncount_attachment_storage(sender, instance, **kwargs):
+    """
+    Deleted attachments no longer count towards storage usage
+    """
+    StorageUsage.record(instance.ticket, instance.uploaded_by, -instance.file_size, count=-1)
+
+
+@receiver(post_delete, sender=Ticket)
+def remove_ticket_storage_usage(sender, instance, **kwargs):
+    """
+    Drop the counter of a deleted ticket once its attachments have been uncounted
+    """
+    StorageUsage.objects.filter(scope='ticket', key=str(instance.pk)).delete()
+
+
+@receiver(post_delete, sender=User)
+def remove_user_storage_usage(sender, instance, **kwargs):
+    """
+    Drop the counter of a deleted user
+    """
+    StorageUsage.objects.filter(scope='user', key=str(instance.pk)).delete()
@@ -0,0 +1,100 @@
+"""
+Content-addressed storage for ticket attachments.
+
+Files are stored under ``cas/<aa>/<bb>/<sha256>`` where the name is the
+SHA-256 of the contents, computed while the upload is streamed to disk. An
+upload whose contents are already stored reuses the existing file, so a
+screenshot attached to fifty tickets occupies disk space once. Which
+attachments share a file is tracked by StoredBlob reference counts.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+CAS_PREFIX = 'cas'
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+def blob_name(content_hash):
+    return f'{CAS_PREFIX}/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}'
+
+
+def hash_from_name(name):
+    """
+    Return the content hash encoded in a stored name, or None for files saved
+    before content addressing was introduced
+    """
+    if not name or not name.startswith(f'{CAS_PREFIX}/'):
+        return None
+    return os.path.basename(name)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that names files after the SHA-256 of their contents
+    """
+
+    def _save(self, name, content):
+        return self.save_blob(content)[0]
+
+    def save_blob(self, content):
+        """
+        Store ``content`` and return ``(name, created)``, where ``created`` is
+        False if identical content was already stored
+        """
+        tmp_dir = self.path(f'{CAS_PREFIX}/tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+
+        if hasattr(content, 'temporary_file_path'):
+            # Already on disk (large or chunked uploads): hash it in place and move it
+            source = content.temporary_file_path()
+            temp_path = None
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(COPY_BLOCK_SIZE), b''):
+                    digest.update(block)
+        else:
+            source = None
+            fd, temp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.upload')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    for chunk in content.chunks(COPY_BLOCK_SIZE):
+                        digest.update(chunk)
+                        out.write(chunk)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+
+        name = blob_name(digest.hexdigest())
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        created = not os.path.exists(full_path)
+        if not created:
+            # Deduplicated; refresh the mtime so garbage collection keeps the blob
+            os.utime(full_path)
+            if temp_path:
+                os.remove(temp_path)
+        elif temp_path:
+            os.replace(temp_path, full_path)
+        else:
+            file_move_safe(source, full_path, allow_overwrite=True)
+
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name, created
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is chosen by _save from the contents, never by the caller
+        return name
+
+
+attachment_storage = ContentAddressedStorage()
+
+
+def get_attachment_storage():
+    return attachment_storage
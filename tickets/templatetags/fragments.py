@@ -0,0 +1,35 @@
+"""
+Version strings for ``{% cache %}`` fragment keys.
+
+A fragment key includes the release (so a deploy with changed templates
+never serves fragments rendered by the old ones) and the version of each
+tickets.caching namespace the fragment is built from, so invalidating a
+namespace also retires its fragments.
+"""
+
+from django import template
+from django.conf import settings
+
+from .. import caching
+
+register = template.Library()
+
+
+@register.simple_tag
+def fragment_version(*namespaces):
+    """
+    ``{% fragment_version 'analytics' as version %}``
+    """
+    versions = [str(caching.namespace_version(namespace)) for namespace in namespaces]
+    return '-'.join([settings.TEMPLATE_FRAGMENT_RELEASE] + versions)
+
+
+@register.simple_tag
+def ticket_fragment_version(ticket):
+    """
+    Version for fragments showing one ticket, its comments or its attachments
+
+    People's names are part of these fragments, so they follow the staff
+    namespace too, which changes whenever a user is saved.
+    """
+    return fragment_version(caching.ticket_namespace(ticket.pk), 'staff')
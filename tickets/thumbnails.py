@@ -0,0 +1,155 @@
+"""
+Background WebP previews for image attachments.
+
+New image attachments get their previews rendered in a pool of worker
+processes once the upload has committed. Previews are named after the
+attachment's content hash, so duplicate uploads share them, and they are
+stored next to the blobs in attachment storage. A preview that is requested
+before it exists is rendered on demand. Cold blobs are rendered from a
+temporary decompressed copy, so previews never move them back to hot storage.
+"""
+
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+from .imaging import render_previews
+from .storage import CAS_PREFIX, attachment_storage
+from .tiering import COPY_BLOCK_SIZE, open_attachment
+
+PREVIEW_DIR = 'previews'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def preview_name(attachment, variant):
+    key = attachment.blob_id or f'attachment-{attachment.pk}'
+    return f'{PREVIEW_DIR}/{key[:2]}/{key}-{variant}.webp'
+
+
+def preview_path(attachment, variant):
+    return attachment_storage.path(preview_name(attachment, variant))
+
+
+def has_previews(attachment):
+    return all(os.path.exists(preview_path(attachment, variant)) for variant in settings.ATTACHMENT_PREVIEW_SIZES)
+
+
+def get_executor():
+    """
+    Return the process pool, started on first use
+
+    Workers are spawned rather than forked so they do not inherit database
+    connections or server sockets from the web worker.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.THUMBNAIL_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+    return _executor
+
+
+@atexit.register
+def _shutdown_executor():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_previews(attachment):
+    """
+    Start rendering all preview sizes for an image attachment
+    
+    Returns a Future, or None if there is nothing to do. With THUMBNAIL_WORKERS
+    set to 0 the previews are rendered in the calling thread instead.
+    """
+    if not attachment.is_image or has_previews(attachment):
+        return None
+    
+    source, temporary = _render_source(attachment)
+    targets = [
+        (preview_path(attachment, variant), max_edge)
+        for variant, max_edge in settings.ATTACHMENT_PREVIEW_SIZES.items()
+    ]
+    if not settings.THUMBNAIL_WORKERS:
+        try:
+            render_previews(source, targets)
+        finally:
+            if temporary:
+                os.remove(source)
+        return None
+    
+    try:
+        future = get_executor().submit(render_previews, source, targets)
+    except BaseException:
+        if temporary:
+            os.remove(source)
+        raise
+    future.add_done_callback(
+        lambda f, name=attachment.original_filename: _finish(f, name, source if temporary else None)
+    )
+    return future
+
+
+def _render_source(attachment):
+    """
+    Path to render an attachment from, and whether it is a temporary copy
+
+    A cold blob is decompressed next to the blobs rather than rehydrated.
+    """
+    path = attachment.file.path
+    if os.path.exists(path):
+        return path, False
+    tmp_dir = attachment_storage.path(f'{CAS_PREFIX}/tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.preview')
+    try:
+        with os.fdopen(fd, 'wb') as out, open_attachment(attachment) as stored:
+            shutil.copyfileobj(stored, out, COPY_BLOCK_SIZE)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path, True
+
+
+def _finish(future, filename, temp_path):
+    if temp_path is not None and os.path.exists(temp_path):
+        os.remove(temp_path)
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Failed to render previews for {filename}: {future.exception()}")
+
+
+def schedule_previews(attachment):
+    """
+    Render previews once the transaction that saved the attachment commits
+    """
+    def submit():
+        try:
+            submit_previews(attachment)
+        except Exception as e:
+            print(f"Failed to render previews for {attachment.original_filename}: {e}")
+    
+    transaction.on_commit(submit)
+
+
+def ensure_preview(attachment, variant, timeout=30):
+    """
+    Return the path of a preview, rendering it now if the background job has not
+    """
+    path = preview_path(attachment, variant)
+    if not os.path.exists(path):
+        future = submit_previews(attachment)
+        if future is not None:
+            future.result(timeout=timeout)
+    return path
@@ -0,0 +1,174 @@
+"""
+Hot/cold tiering for attachment blobs.
+
+Blobs used only by tickets that were resolved or closed long ago are gzipped
+into the cold storage backend (ATTACHMENT_COLD_STORAGE, a local archive
+directory by default, or any Django storage such as an object store). The
+hot copy is then removed. Attachment rows keep their content-addressed names,
+so nothing else has to change.
+
+A download of a cold attachment rehydrates it into hot storage, checking the
+SHA-256 on the way. The ZIP download reads cold members straight from the
+compressed copy instead.
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils.module_loading import import_string
+
+from .models import Attachment, StoredBlob
+from .storage import CAS_PREFIX, attachment_storage
+
+COPY_BLOCK_SIZE = 64 * 1024
+CLOSED_STATUSES = ('resolved', 'closed')
+
+_cold_storage = None
+_cold_storage_lock = threading.Lock()
+
+
+class _ColdReader(gzip.GzipFile):
+    """
+    Decompressing reader that also closes the cold storage file underneath it
+    """
+
+    def __init__(self, stored):
+        self._stored = stored
+        super().__init__(fileobj=stored, mode='rb')
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._stored.close()
+
+
+def get_cold_storage():
+    global _cold_storage
+    if _cold_storage is None:
+        with _cold_storage_lock:
+            if _cold_storage is None:
+                config = settings.ATTACHMENT_COLD_STORAGE
+                _cold_storage = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    return _cold_storage
+
+
+def cold_candidates(cutoff):
+    """
+    Hot blobs whose every attachment belongs to a ticket closed before ``cutoff``
+    """
+    still_needed = Attachment.objects.filter(blob=OuterRef('pk')).exclude(
+        ticket__status__in=CLOSED_STATUSES, ticket__updated_at__lt=cutoff,
+    )
+    return StoredBlob.objects.filter(storage_tier='hot', ref_count__gt=0).filter(
+        Exists(Attachment.objects.filter(blob=OuterRef('pk'))),
+        ~Exists(still_needed),
+    )
+
+
+def demote_blob(blob, cutoff, min_mtime):
+    """
+    Move one blob to cold storage; returns False if it no longer qualifies
+
+    ``min_mtime`` protects blobs that a recent upload deduplicated against.
+    """
+    hot_path = attachment_storage.path(blob.name)
+    try:
+        if os.path.getmtime(hot_path) >= min_mtime:
+            return False
+    except FileNotFoundError:
+        return False
+
+    cold = get_cold_storage()
+    cold_name = f'{blob.name}.gz'
+    with tempfile.TemporaryFile() as compressed:
+        with open(hot_path, 'rb') as source, gzip.GzipFile(fileobj=compressed, mode='wb', mtime=0) as gz:
+            shutil.copyfileobj(source, gz, COPY_BLOCK_SIZE)
+        compressed.seek(0)
+        if cold.exists(cold_name):
+            cold.delete(cold_name)
+        cold_name = cold.save(cold_name, File(compressed))
+    # Record the copy straight away so readers can always fall back to it
+    StoredBlob.objects.filter(pk=blob.pk).update(cold_name=cold_name)
+
+    with transaction.atomic():
+        locked = cold_candidates(cutoff).select_for_update().filter(pk=blob.pk).first()
+        if locked is None:
+            # A new upload or a reopened ticket needs it hot again; keep the spare cold copy
+            return False
+        locked.storage_tier = 'cold'
+        locked.cold_name = cold_name
+        locked.save(update_fields=['storage_tier', 'cold_name'])
+        # Still under the row lock, so a concurrent acquire waits until the file is gone
+        # and then finds it missing; readers fall back to the cold copy (see ensure_local)
+        attachment_storage.delete(blob.name)
+    return True
+
+
+def rehydrate(blob):
+    """
+    Restore a blob's hot file from its cold copy, verifying the content hash
+    """
+    tmp_dir = attachment_storage.path(f'{CAS_PREFIX}/tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.rehydrate')
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, 'wb') as out, get_cold_storage().open(blob.cold_name, 'rb') as stored, \
+                gzip.GzipFile(fileobj=stored, mode='rb') as gz:
+            for block in iter(lambda: gz.read(COPY_BLOCK_SIZE), b''):
+                digest.update(block)
+                out.write(block)
+        if digest.hexdigest() != blob.content_hash:
+            raise IOError(f'Cold copy of {blob.content_hash} is corrupt')
+        hot_path = attachment_storage.path(blob.name)
+        os.makedirs(os.path.dirname(hot_path), exist_ok=True)
+        os.replace(temp_path, hot_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    StoredBlob.objects.filter(pk=blob.pk).update(storage_tier='hot')
+    return hot_path
+
+
+def _cold_blob(attachment):
+    if not attachment.blob_id:
+        return None
+    blob = attachment.blob
+    return blob if blob.cold_name else None
+
+
+def ensure_local(attachment):
+    """
+    Path of the attachment's file in hot storage, rehydrating it from the cold tier if needed
+    """
+    path = attachment.file.path
+    if os.path.exists(path):
+        return path
+    blob = _cold_blob(attachment)
+    if blob is None:
+        raise FileNotFoundError(path)
+    return rehydrate(blob)
+
+
+def open_attachment(attachment):
+    """
+    Open an attachment for reading from whichever tier holds it, without rehydrating
+    """
+    path = attachment.file.path
+    if os.path.exists(path):
+        return open(path, 'rb')
+    blob = _cold_blob(attachment)
+    if blob is None:
+        raise FileNotFoundError(path)
+    return _ColdReader(get_cold_storage().open(blob.cold_name, 'rb'))
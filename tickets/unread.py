@@ -0,0 +1,60 @@
+"""
+Cached per-user unread chat message counters for the navigation badge.
+
+The Conversation unread columns are the source of truth; they are kept up to
+date by Conversation.send_message and mark_read. The cached total is only a
+hint: it lives for a few seconds and is dropped whenever one of the user's
+counters changes, so the next read recounts from the columns. It is stored in
+the shared cache tier directly, because a worker's local copy would not see
+another worker dropping it. Counters are never adjusted with incr/decr, which
+is not atomic on the file and database caches.
+"""
+
+from django.core.cache import caches
+from django.db.models import Q, Sum
+
+from .cache_backends import TieredCache
+from .models import Conversation
+
+# Bounds how long a hint can lag behind a change whose invalidation raced a rebuild
+UNREAD_CACHE_TIMEOUT = 10
+
+
+def _cache_key(user_id):
+    return f'chat:unread:{user_id}'
+
+
+def _cache():
+    cache = caches['default']
+    return cache.shared if isinstance(cache, TieredCache) else cache
+
+
+def count_unread(user):
+    """
+    Sum the user's unread counters from the Conversation table
+    """
+    totals = Conversation.objects.filter(Q(user_low=user) | Q(user_high=user)).aggregate(
+        low=Sum('user_low_unread', filter=Q(user_low=user)),
+        high=Sum('user_high_unread', filter=Q(user_high=user)),
+    )
+    return (totals['low'] or 0) + (totals['high'] or 0)
+
+
+def get_unread_count(user):
+    """
+    Return the number of unread chat messages for a user
+    """
+    key = _cache_key(user.pk)
+    count = _cache().get(key)
+    if count is None:
+        count = count_unread(user)
+        # add() so a concurrently rebuilt counter is not clobbered
+        _cache().add(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_unread(user_id):
+    """
+    Drop the cached count after the user's unread counters changed
+    """
+    _cache().delete(_cache_key(user_id))
@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods, require_POST
+import json
+import os
+
+from .forms import validate_attachment_name, validate_attachment_quota
+from .models import Ticket, UploadSession
+from .uploads import UploadError, abort_session, append_chunk, assemble_attachment, receive_chunk, start_part_file
+
+
+def _can_attach(user, ticket):
+    return user.profile.is_it_staff or ticket.created_by_id == user.id
+
+
+def _session_state(session):
+    return {
+        'success': True,
+        'upload_id': str(session.id),
+        'filename': session.filename,
+        'total_size': session.total_size,
+        'offset': session.received_size,
+        'checksum': session.checksum,
+        'chunk_size': settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+        'status': session.status,
+    }
+
+
+@login_required
+@require_POST
+def upload_start_view(request):
+    """
+    Open a chunked upload session, or return the unfinished one for the same file (AJAX)
+    """
+    try:
+        data = json.loads(request.body)
+        ticket = get_object_or_404(Ticket, ticket_id=data.get('ticket_id'))
+        filename = os.path.basename(str(data.get('filename', '')))
+        total_size = int(data.get('size', 0))
+    except (ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Invalid upload request'}, status=400)
+
+    if not _can_attach(request.user, ticket):
+        return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+
+    try:
+        validate_attachment_name(filename)
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'error': e.messages[0]}, status=400)
+
+    if total_size <= 0 or total_size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        return JsonResponse({
+            'success': False,
+            'error': f'File size must be between 1 byte and {settings.CHUNKED_UPLOAD_MAX_SIZE // (1024 * 1024)}MB',
+        }, status=400)
+
+    try:
+        validate_attachment_quota(ticket, request.user, total_size)
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'error': e.messages[0]}, status=413)
+
+    # Offer the unfinished session for the same file so the client can resume;
+    # the client compares the returned checksum with its own copy before continuing
+    session = UploadSession.objects.filter(
+        ticket=ticket, uploaded_by=request.user, filename=filename,
+        total_size=total_size, status='uploading',
+    ).first()
+    if session is None or not os.path.exists(session.part_path):
+        session = UploadSession.objects.create(
+            ticket=ticket, uploaded_by=request.user, filename=filename, total_size=total_size,
+        )
+        start_part_file(session)
+
+    return JsonResponse(_session_state(session))
+
+
+@login_required
+@require_http_methods(['GET', 'PUT', 'DELETE'])
+def upload_session_view(request, upload_id):
+    """
+    Report progress (GET), append a chunk (PUT) or abort (DELETE) an upload session (AJAX)
+
+    PUT requests carry the raw chunk as the body, the byte offset it starts at in
+    X-Upload-Offset and the CRC32 of the file up to the end of the chunk in
+    X-Upload-Checksum (hex).
+    """
+    if request.method == 'DELETE':
+        with transaction.atomic():
+            session = get_object_or_404(
+                UploadSession.objects.select_for_update(), id=upload_id, uploaded_by=request.user
+            )
+            abort_session(session)
+        return JsonResponse({'success': True})
+
+    session = get_object_or_404(UploadSession, id=upload_id, uploaded_by=request.user)
+    if request.method == 'GET':
+        return JsonResponse(_session_state(session))
+
+    try:
+        offset = int(request.headers['X-Upload-Offset'])
+        length = int(request.headers.get('Content-Length') or 0)
+        checksum = request.headers.get('X-Upload-Checksum')
+        expected_checksum = int(checksum, 16) if checksum else None
+    except (KeyError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Missing or invalid chunk headers'}, status=400)
+
+    chunk = None
+    try:
+        # Reading from the client can be slow, so it happens before any lock is taken
+        chunk = receive_chunk(session, request, offset, length, expected_checksum)
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            append_chunk(session, chunk)
+    except UploadError as e:
+        state = _session_state(session)
+        state.update(success=False, error=str(e))
+        return JsonResponse(state, status=e.status)
+    finally:
+        if chunk is not None:
+            chunk.discard()
+
+    return JsonResponse(_session_state(session))
+
+
+@login_required
+@require_POST
+def upload_complete_view(request, upload_id):
+    """
+    Assemble a fully received upload into a ticket attachment (AJAX)
+    """
+    with transaction.atomic():
+        session = get_object_or_404(
+            UploadSession.objects.select_for_update().select_related('ticket', 'attachment'),
+            id=upload_id, uploaded_by=request.user,
+        )
+        try:
+            attachment = assemble_attachment(session)
+        except UploadError as e:
+            state = _session_state(session)
+            state.update(success=False, error=str(e))
+            return JsonResponse(state, status=e.status)
+
+    return JsonResponse({
+        'success': True,
+        'attachment': {
+            'id': attachment.id,
+            'filename': attachment.original_filename,
+            'size': attachment.file_size,
+            'size_display': attachment.get_file_size_display(),
+            'url': reverse('tickets:download_attachment', args=[attachment.id]),
+        },
+    })
@@ -0,0 +1,171 @@
+"""
+Chunked, resumable attachment uploads.
+
+A client opens an UploadSession, then sends the file as a series of PUT
+requests. Each chunk is streamed from the request into a staging file while
+the CRC32 of everything received so far is updated, and the client sends the
+checksum it expects after the chunk. This happens without any database lock,
+because a slow client can take a long time to send a chunk. Only a complete
+chunk with the right checksum is then appended to the session's ``.part``
+file, under a brief lock on the session row that also checks that no other
+request advanced the offset meanwhile. The part file therefore always holds a
+verified prefix and an interrupted upload resumes from ``received_size``.
+
+When the last byte has arrived, the part file is moved into attachment storage
+without being read back into memory.
+"""
+
+import os
+import shutil
+import uuid
+import zlib
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+
+from .models import Attachment
+
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """
+    A chunk or session request that cannot be applied, with the HTTP status to report
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class AssembledUpload(File):
+    """
+    A finished part file, exposed like Django's temporary uploads so
+    FileSystemStorage moves it into place instead of copying it
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def start_part_file(session):
+    os.makedirs(str(settings.CHUNKED_UPLOAD_DIR), exist_ok=True)
+    open(session.part_path, 'wb').close()
+
+
+def _check_chunk(session, offset, length):
+    if session.status != 'uploading':
+        raise UploadError('Upload is no longer accepting data', status=409)
+    if offset != session.received_size:
+        raise UploadError('Chunk offset does not match the received size', status=409)
+    if length <= 0 or length > settings.CHUNKED_UPLOAD_CHUNK_SIZE:
+        raise UploadError(f'Chunks must be between 1 and {settings.CHUNKED_UPLOAD_CHUNK_SIZE} bytes')
+    if offset + length > session.total_size:
+        raise UploadError('Chunk extends past the declared file size')
+
+
+class ReceivedChunk:
+    """
+    A verified chunk waiting in its staging file to be appended to the part file
+    """
+
+    def __init__(self, session, offset, base_checksum):
+        self.offset = offset
+        self.base_checksum = base_checksum
+        self.checksum = base_checksum
+        self.length = 0
+        self.path = os.path.join(str(settings.CHUNKED_UPLOAD_DIR), f'{session.id}.{uuid.uuid4().hex}.chunk')
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def receive_chunk(session, stream, offset, length, expected_checksum=None):
+    """
+    Read ``length`` bytes from ``stream`` into a staging file and verify them
+
+    Needs no lock; ``session`` is only used for the starting offset and
+    checksum. Returns a ReceivedChunk for append_chunk(), which the caller
+    must discard() afterwards.
+    """
+    _check_chunk(session, offset, length)
+
+    os.makedirs(str(settings.CHUNKED_UPLOAD_DIR), exist_ok=True)
+    chunk = ReceivedChunk(session, offset, session.checksum)
+    try:
+        with open(chunk.path, 'wb') as staged:
+            while chunk.length < length:
+                block = stream.read(min(COPY_BLOCK_SIZE, length - chunk.length))
+                if not block:
+                    break
+                staged.write(block)
+                chunk.checksum = zlib.crc32(block, chunk.checksum)
+                chunk.length += len(block)
+
+        if chunk.length != length:
+            raise UploadError('Chunk ended before the declared length')
+        if expected_checksum is not None and chunk.checksum != expected_checksum:
+            raise UploadError('Checksum mismatch, resend the chunk', status=422)
+    except BaseException:
+        chunk.discard()
+        raise
+    return chunk
+
+
+def append_chunk(session, chunk):
+    """
+    Append a received chunk to the session's part file and advance the session
+
+    The caller must hold a lock on the session row, freshly read, so a chunk
+    that another request already appended is rejected rather than added twice.
+    """
+    _check_chunk(session, chunk.offset, chunk.length)
+    if session.checksum != chunk.base_checksum:
+        raise UploadError('Chunk offset does not match the received size', status=409)
+
+    with open(session.part_path, 'ab') as part, open(chunk.path, 'rb') as staged:
+        # Drop anything left behind by an earlier interrupted append
+        part.truncate(chunk.offset)
+        shutil.copyfileobj(staged, part, COPY_BLOCK_SIZE)
+
+    session.received_size = chunk.offset + chunk.length
+    session.checksum = chunk.checksum
+    session.save(update_fields=['received_size', 'checksum', 'updated_at'])
+    return session
+
+
+def assemble_attachment(session):
+    """
+    Turn a fully received session into an Attachment on its ticket
+    """
+    if session.status == 'complete' and session.attachment_id:
+        return session.attachment
+    if session.status != 'uploading':
+        raise UploadError('Upload was aborted', status=409)
+    if not session.is_finished:
+        raise UploadError('Upload is missing data', status=409)
+    if os.path.getsize(session.part_path) != session.total_size:
+        raise UploadError('Stored data does not match the received size, restart the upload', status=409)
+
+    attachment = Attachment(ticket=session.ticket, uploaded_by=session.uploaded_by)
+    with open(session.part_path, 'rb') as part:
+        attachment.file = AssembledUpload(part, name=session.filename)
+        with transaction.atomic():
+            attachment.save()
+            session.status = 'complete'
+            session.attachment = attachment
+            session.save(update_fields=['status', 'attachment', 'updated_at'])
+
+    # Storage moves the part file; remove it if it had to be copied instead
+    session.discard_part()
+    return attachment
+
+
+def abort_session(session):
+    session.status = 'aborted'
+    session.save(update_fields=['status', 'updated_at'])
+    session.discard_part()
@@ -1,20 +1,29 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from . import export_views
+from . import upload_views
+from . import download_views
 
 app_name = 'tickets'
 
+# Under ASGI the busiest read views are served by their async versions
+if settings.TICKETS_ASYNC_VIEWS:
+    from . import async_views as read_views
+else:
+    read_views = views
+
 urlpatterns = [
     # Authentication
     path('register/', views.register_view, name='register'),
     
     # Main views
     path('', views.home_view, name='home'),
-    path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('dashboard/', read_views.dashboard_view, name='dashboard'),
     
     # Ticket management
     path('tickets/create/', views.create_ticket_view, name='create_ticket'),
-    path('tickets/<str:ticket_id>/', views.ticket_detail_view, name='ticket_detail'),
+    path('tickets/<str:ticket_id>/', read_views.ticket_detail_view, name='ticket_detail'),
     path('tickets/<str:ticket_id>/update-status/', views.update_ticket_status_view, name='update_ticket_status'),
     path('tickets/<str:ticket_id>/escalate/', views.escalate_ticket_view, name='escalate_ticket'),
     
@@ -23,11 +32,22 @@ urlpatterns = [
     path('chat/', views.chat_view, name='chat'),
     
     # Analytics
-    path('analytics/', views.analytics_view, name='analytics'),
+    path('analytics/', read_views.analytics_view, name='analytics'),
     
     # AJAX endpoints
     path('api/send-message/', views.send_message_view, name='send_message'),
-    path('api/get-messages/<int:user_id>/', views.get_messages_view, name='get_messages'),
+    path('api/get-messages/<int:user_id>/', read_views.get_messages_view, name='get_messages'),
+    path('api/wait-messages/<int:user_id>/', views.wait_messages_view, name='wait_messages'),
+    path('api/chat-archive/<int:user_id>/', views.archived_messages_view, name='archived_messages'),
+    path('api/chat-stream/', views.chat_stream_view, name='chat_stream'),
+    path('api/unread/', views.unread_count_view, name='unread_count'),
+    path('api/chat-users/', views.user_search_view, name='user_search'),
+    path('tickets/<str:ticket_id>/attachments.zip', download_views.download_all_attachments_view, name='download_all_attachments'),
+    path('attachments/<int:attachment_id>/download/', download_views.download_attachment_view, name='download_attachment'),
+    path('attachments/<int:attachment_id>/<slug:variant>.webp', download_views.attachment_preview_view, name='attachment_preview'),
+    path('api/uploads/', upload_views.upload_start_view, name='upload_start'),
+    path('api/uploads/<uuid:upload_id>/', upload_views.upload_session_view, name='upload_session'),
+    path('api/uploads/<uuid:upload_id>/complete/', upload_views.upload_complete_view, name='upload_complete'),
     path('api/toggle-dark-mode/', views.toggle_dark_mode_view, name='toggle_dark_mode'),
     
     # Export endpoints
@@ -3,21 +3,36 @@ from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Max
 from django.utils import timezone
 from django.core.mail import send_mail
+from django.core.exceptions import ValidationError
 from django.conf import settings
+from django.db import connection, transaction
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.urls import reverse
 from datetime import datetime, timedelta
+import asyncio
 import json
 import os
 
-from .models import UserProfile, Ticket, Comment, Attachment, ChatMessage, TicketNotification
-from .forms import TicketForm, CommentForm, AttachmentForm, UserRegistrationForm, UserProfileForm
+from .models import (
+    UserProfile, Ticket, Comment, ChatMessage, Conversation, ArchivedChatMessage, TicketNotification
+)
+from .forms import (
+    TicketForm, CommentForm, AttachmentForm, UserRegistrationForm, UserProfileForm, validate_attachment_upload,
+    validate_attachment_quota,
+)
+from .attachments import store_uploads, create_attachments
+from .chat_events import get_broker, get_chat_signal, publish_to_user, user_channel
+from .unread import get_unread_count, invalidate_unread
+from .directory import get_it_staff, it_staff_ids, search_users
+from . import caching
+from .presence import get_presence, online_user_ids
 
 
 def home_view(request):
@@ -113,8 +128,8 @@ def register_view(request):
             
             # Send notification to IT staff about new user registration
             try:
-                it_staff = User.objects.filter(profile__is_it_staff=True)
-                if it_staff.exists():
+                it_staff = get_it_staff()
+                if it_staff:
                     notification_subject = f"👤 New User Registered: {user.username}"
                     notification_message = f"""
                     <html>
@@ -177,14 +192,19 @@ def register_view(request):
     return render(request, 'tickets/register.html', {'form': form})
 
 
-@login_required
-def dashboard_view(request):
+def _dashboard_filters(request):
+    return {
+        'status': request.GET.get('status'),
+        'priority': request.GET.get('priority'),
+        'category': request.GET.get('category'),
+        'search': request.GET.get('search'),
+    }
+
+
+def _dashboard_tickets(user, profile, filters):
     """
-    Main dashboard view showing tickets and analytics
+    Tickets the user may see on the dashboard, narrowed by the filter form
     """
-    user = request.user
-    profile = user.profile
-    
     # Get tickets based on user role
     if profile.is_it_staff:
         # IT staff can see all tickets
@@ -194,60 +214,80 @@ def dashboard_view(request):
         tickets = Ticket.objects.filter(created_by=user).select_related('assigned_to')
     
     # Apply filters
-    status_filter = request.GET.get('status')
-    priority_filter = request.GET.get('priority')
-    category_filter = request.GET.get('category')
-    search_query = request.GET.get('search')
-    
-    if status_filter:
-        tickets = tickets.filter(status=status_filter)
-    if priority_filter:
-        tickets = tickets.filter(priority=priority_filter)
-    if category_filter:
-        tickets = tickets.filter(category=category_filter)
-    if search_query:
+    if filters['status']:
+        tickets = tickets.filter(status=filters['status'])
+    if filters['priority']:
+        tickets = tickets.filter(priority=filters['priority'])
+    if filters['category']:
+        tickets = tickets.filter(category=filters['category'])
+    if filters['search']:
         tickets = tickets.filter(
-            Q(ticket_id__icontains=search_query) |
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query)
+            Q(ticket_id__icontains=filters['search']) |
+            Q(title__icontains=filters['search']) |
+            Q(description__icontains=filters['search'])
         )
-    
-    # Pagination
-    paginator = Paginator(tickets, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Analytics data
-    analytics = {
-        'total_tickets': tickets.count(),
-        'open_tickets': tickets.filter(status='open').count(),
-        'in_progress_tickets': tickets.filter(status='in_progress').count(),
-        'resolved_tickets': tickets.filter(status='resolved').count(),
-        'escalated_tickets': tickets.filter(status='escalated').count(),
-        'high_priority_tickets': tickets.filter(priority='high').count(),
-        'urgent_tickets': tickets.filter(priority='urgent').count(),
-    }
-    
-    # Recent activity
-    recent_comments = Comment.objects.filter(
+    return tickets
+
+
+def _dashboard_analytics(tickets, user, profile, filters):
+    """
+    Ticket counts for the dashboard cards, cached per audience and filter combination until tickets change
+    """
+    return caching.get_or_set(
+        'dashboard',
+        ('all' if profile.is_it_staff else user.id, filters['status'], filters['priority'],
+         filters['category'], filters['search']),
+        lambda: {
+            'total_tickets': tickets.count(),
+            'open_tickets': tickets.filter(status='open').count(),
+            'in_progress_tickets': tickets.filter(status='in_progress').count(),
+            'resolved_tickets': tickets.filter(status='resolved').count(),
+            'escalated_tickets': tickets.filter(status='escalated').count(),
+            'high_priority_tickets': tickets.filter(priority='high').count(),
+            'urgent_tickets': tickets.filter(priority='urgent').count(),
+        },
+    )
+
+
+def _recent_comments(tickets):
+    return Comment.objects.filter(
         ticket__in=tickets
     ).select_related('author', 'ticket').order_by('-created_at')[:5]
-    
-    context = {
+
+
+def _dashboard_context(page_obj, analytics, recent_comments, filters, profile):
+    return {
         'page_obj': page_obj,
         'analytics': analytics,
         'recent_comments': recent_comments,
         'status_choices': Ticket.STATUS_CHOICES,
         'priority_choices': Ticket.PRIORITY_CHOICES,
         'category_choices': Ticket.CATEGORY_CHOICES,
-        'current_filters': {
-            'status': status_filter,
-            'priority': priority_filter,
-            'category': category_filter,
-            'search': search_query,
-        },
+        'current_filters': filters,
         'is_it_staff': profile.is_it_staff,
     }
+
+
+@login_required
+def dashboard_view(request):
+    """
+    Main dashboard view showing tickets and analytics
+    """
+    user = request.user
+    profile = user.profile
+    filters = _dashboard_filters(request)
+    tickets = _dashboard_tickets(user, profile, filters)
+    
+    # Pagination
+    paginator = Paginator(tickets, 10)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    analytics = _dashboard_analytics(tickets, user, profile, filters)
+    
+    # Recent activity
+    recent_comments = _recent_comments(tickets)
+    
+    context = _dashboard_context(page_obj, analytics, recent_comments, filters, profile)
     
     return render(request, 'tickets/dashboard.html', context)
 
@@ -257,21 +297,31 @@ def create_ticket_view(request):
     """
     Create new support ticket
     """
+    attachment_errors = []
     if request.method == 'POST':
         form = TicketForm(request.POST, request.FILES)
-        if form.is_valid():
+        files = request.FILES.getlist('attachments')
+        for file in files:
+            try:
+                validate_attachment_upload(file)
+            except ValidationError as e:
+                attachment_errors.append(f'{file.name}: {e.messages[0]}')
+        if files and not attachment_errors:
+            try:
+                validate_attachment_quota(None, request.user, sum(file.size for file in files))
+            except ValidationError as e:
+                attachment_errors.append(e.messages[0])
+        
+        if form.is_valid() and not attachment_errors:
             ticket = form.save(commit=False)
             ticket.created_by = request.user
-            ticket.save()
             
-            # Handle file attachments
-            files = request.FILES.getlist('attachments')
-            for file in files:
-                Attachment.objects.create(
-                    ticket=ticket,
-                    file=file,
-                    uploaded_by=request.user
-                )
+            # Write attachment files in parallel before opening the transaction,
+            # then create the ticket and all attachment rows together
+            stored = store_uploads(files)
+            with transaction.atomic():
+                ticket.save()
+                create_attachments(ticket, request.user, stored)
             
             # Send email notification to ticket creator
             try:
@@ -348,8 +398,8 @@ def create_ticket_view(request):
             
             # Send notification to IT staff about new ticket
             try:
-                it_staff = User.objects.filter(profile__is_it_staff=True)
-                if it_staff.exists():
+                it_staff = get_it_staff()
+                if it_staff:
                     staff_subject = f"🎫 New Ticket Created: {ticket.ticket_id} - {ticket.title}"
                     staff_message = f"""
                     <html>
@@ -428,7 +478,29 @@ def create_ticket_view(request):
     else:
         form = TicketForm()
     
-    return render(request, 'tickets/create_ticket.html', {'form': form})
+    return render(request, 'tickets/create_ticket.html', {'form': form, 'attachment_errors': attachment_errors})
+
+
+def _visible_comments(ticket, profile):
+    """
+    The ticket's comments, without internal ones for non-IT staff
+    """
+    comments = ticket.comments.select_related('author')
+    if not profile.is_it_staff:
+        comments = comments.filter(is_internal=False)
+    return comments
+
+
+def _ticket_detail_context(ticket, comments, attachments, comment_form, attachment_form, profile):
+    return {
+        'ticket': ticket,
+        'comments': comments,
+        'attachments': attachments,
+        'comment_form': comment_form,
+        'attachment_form': attachment_form,
+        'is_it_staff': profile.is_it_staff,
+        'can_escalate': profile.is_it_staff and ticket.status not in ['resolved', 'closed'],
+    }
 
 
 @login_required
@@ -445,13 +517,8 @@ def ticket_detail_view(request, ticket_id):
         messages.error(request, 'You do not have permission to view this ticket.')
         return redirect('tickets:dashboard')
     
-    # Get comments (filter internal comments for non-IT staff)
-    comments = ticket.comments.all()
-    if not profile.is_it_staff:
-        comments = comments.filter(is_internal=False)
-    
-    # Get attachments
-    attachments = ticket.attachments.all()
+    comments = _visible_comments(ticket, profile)
+    attachments = ticket.attachments.select_related('uploaded_by')
     
     # Handle new comment
     if request.method == 'POST':
@@ -483,7 +550,7 @@ def ticket_detail_view(request, ticket_id):
     
     # Handle file upload
     if request.method == 'POST' and 'attachment' in request.FILES:
-        attachment_form = AttachmentForm(request.POST, request.FILES)
+        attachment_form = AttachmentForm(request.POST, request.FILES, ticket=ticket, user=user)
         if attachment_form.is_valid():
             attachment = attachment_form.save(commit=False)
             attachment.ticket = ticket
@@ -494,15 +561,7 @@ def ticket_detail_view(request, ticket_id):
     else:
         attachment_form = AttachmentForm()
     
-    context = {
-        'ticket': ticket,
-        'comments': comments,
-        'attachments': attachments,
-        'comment_form': comment_form,
-        'attachment_form': attachment_form,
-        'is_it_staff': profile.is_it_staff,
-        'can_escalate': profile.is_it_staff and ticket.status not in ['resolved', 'closed'],
-    }
+    context = _ticket_detail_context(ticket, comments, attachments, comment_form, attachment_form, profile)
     
     return render(request, 'tickets/ticket_detail.html', context)
 
@@ -524,12 +583,8 @@ def update_ticket_status_view(request, ticket_id):
         
         if new_status in dict(Ticket.STATUS_CHOICES):
             ticket.status = new_status
-            if assigned_to_id:
-                try:
-                    assigned_user = User.objects.get(id=assigned_to_id)
-                    ticket.assigned_to = assigned_user
-                except User.DoesNotExist:
-                    pass
+            if _int_param(assigned_to_id) in it_staff_ids():
+                ticket.assigned_to_id = int(assigned_to_id)
             
             ticket.save()
             
@@ -607,7 +662,7 @@ def update_ticket_status_view(request, ticket_id):
         return redirect('tickets:ticket_detail', ticket_id=ticket.ticket_id)
     
     # Get IT staff for assignment dropdown
-    it_staff = User.objects.filter(profile__is_it_staff=True)
+    it_staff = get_it_staff()
     
     context = {
         'ticket': ticket,
@@ -743,8 +798,11 @@ def escalate_ticket_view(request, ticket_id):
             except User.DoesNotExist:
                 messages.error(request, 'Selected user does not exist.')
     
-    # Get IT staff for escalation dropdown
-    it_staff = User.objects.filter(profile__is_it_staff=True).exclude(id=request.user.id)
+    # Get IT staff for escalation dropdown, online colleagues first
+    colleagues = [staff for staff in get_it_staff() if staff.id != request.user.id]
+    last_seen = get_presence(staff.id for staff in colleagues)
+    it_staff = [dict(staff._asdict(), online_since=last_seen[staff.id]) for staff in colleagues]
+    it_staff.sort(key=lambda staff: staff['online_since'] is None)
     
     context = {
         'ticket': ticket,
@@ -754,14 +812,10 @@ def escalate_ticket_view(request, ticket_id):
     return render(request, 'tickets/escalate_ticket.html', context)
 
 
-@login_required
-def calendar_view(request):
+def _calendar_data(user, profile):
     """
-    Calendar view showing tickets by deadline
+    Tickets with deadlines visible to the user, grouped by deadline date
     """
-    user = request.user
-    profile = user.profile
-    
     # Get tickets with deadlines
     if profile.is_it_staff:
         tickets = Ticket.objects.filter(deadline__isnull=False).select_related('created_by', 'assigned_to')
@@ -775,6 +829,20 @@ def calendar_view(request):
         if deadline_str not in calendar_data:
             calendar_data[deadline_str] = []
         calendar_data[deadline_str].append(ticket)
+    return calendar_data
+
+
+@login_required
+def calendar_view(request):
+    """
+    Calendar view showing tickets by deadline
+    """
+    user = request.user
+    profile = user.profile
+    
+    calendar_data = caching.get_or_set(
+        'calendar', ('all' if profile.is_it_staff else user.id,), lambda: _calendar_data(user, profile)
+    )
     
     context = {
         'calendar_data': calendar_data,
@@ -791,26 +859,53 @@ def chat_view(request):
     """
     user = request.user
     
-    # Get recent messages
-    recent_messages = ChatMessage.objects.filter(
-        Q(sender=user) | Q(receiver=user)
-    ).select_related('sender', 'receiver').order_by('-timestamp')[:50]
-    
-    # Get users for chat (IT staff can chat with anyone, regular users with IT staff)
-    if user.profile.is_it_staff:
-        chat_users = User.objects.filter(is_active=True).exclude(id=user.id)
-    else:
-        chat_users = User.objects.filter(profile__is_it_staff=True, is_active=True)
+    # Conversation sidebar with last message and unread counts
+    conversations = list(Conversation.involving(user).select_related(
+        'user_low__profile', 'user_high__profile', 'last_message_sender'
+    )[:50])
+    for conversation in conversations:
+        conversation.other_user = conversation.other_participant(user)
+        conversation.unread = conversation.unread_for(user)
+    online = online_user_ids(conversation.other_user.id for conversation in conversations)
+    for conversation in conversations:
+        conversation.other_user_online = conversation.other_user.id in online
     
+    # Other recipients are found through the user search endpoint
     context = {
-        'recent_messages': recent_messages,
-        'chat_users': chat_users,
+        'conversations': conversations,
         'is_it_staff': user.profile.is_it_staff,
     }
     
     return render(request, 'tickets/chat.html', context)
 
 
+def _int_param(value):
+    """
+    Parse an optional integer query parameter, returning None if missing or invalid
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _serialize_message(msg, viewer):
+    """
+    JSON representation of a chat message as seen by the given user
+    """
+    return {
+        'id': msg.id,
+        'sender': msg.sender.username,
+        'receiver': msg.receiver.username,
+        'sender_id': msg.sender_id,
+        'receiver_id': msg.receiver_id,
+        'message': msg.message,
+        'timestamp': msg.timestamp.isoformat(),
+        'is_read': msg.is_read,
+        'is_sender': msg.sender_id == viewer.id,
+    }
+
+
 @login_required
 @require_POST
 def send_message_view(request):
@@ -827,62 +922,244 @@ def send_message_view(request):
         
         receiver = get_object_or_404(User, id=receiver_id)
         
-        # Create chat message
-        chat_message = ChatMessage.objects.create(
-            sender=request.user,
-            receiver=receiver,
-            message=message_text
-        )
+        # Create chat message and update the conversation summary
+        chat_message = Conversation.send_message(request.user, receiver, message_text)
+        transaction.on_commit(lambda: invalidate_unread(receiver.id))
+        
+        # Push the message to both participants' open chat streams
+        publish_to_user(receiver.id, 'chat_message', _serialize_message(chat_message, receiver))
+        publish_to_user(request.user.id, 'chat_message', _serialize_message(chat_message, request.user))
         
         return JsonResponse({
             'success': True,
-            'message': {
-                'id': chat_message.id,
-                'sender': chat_message.sender.username,
-                'receiver': chat_message.receiver.username,
-                'message': chat_message.message,
-                'timestamp': chat_message.timestamp.isoformat(),
-            }
+            'message': _serialize_message(chat_message, request.user),
         })
     
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+def _history_params(request):
+    """
+    The since_id and before_id cursors and the page size of a chat history request
+    """
+    limit = _int_param(request.GET.get('limit')) or settings.CHAT_HISTORY_PAGE_SIZE
+    limit = max(1, min(limit, settings.CHAT_HISTORY_MAX_PAGE_SIZE))
+    return _int_param(request.GET.get('since_id')), _int_param(request.GET.get('before_id')), limit
+
+
+def _message_page(messages, since_id, before_id, limit):
+    """
+    One page of chat history in display order, and whether another page follows in that direction
+    """
+    page = messages.select_related('sender', 'receiver')
+    if since_id is not None:
+        page = list(page.filter(id__gt=since_id).order_by('id')[:limit + 1])
+        return page[:limit], len(page) > limit
+    if before_id is not None:
+        # Keyset pagination over the (conversation, timestamp, id) index
+        cursor = messages.filter(id=before_id).values_list('timestamp', flat=True).first()
+        if cursor is not None:
+            page = page.filter(Q(timestamp__lt=cursor) | Q(timestamp=cursor, id__lt=before_id))
+        else:
+            page = page.filter(id__lt=before_id)
+    page = list(page.order_by('-timestamp', '-id')[:limit + 1])
+    return page[:limit][::-1], len(page) > limit
+
+
 @login_required
 def get_messages_view(request, user_id):
     """
     Get messages between current user and specified user (AJAX)
+    
+    Without a cursor the latest ``limit`` messages are returned. ``before_id``
+    pages backwards through older history and ``since_id`` returns only newer
+    messages, so polling clients can append deltas. ``has_more`` tells whether
+    another page exists in that direction; ``more_in_archive`` means older
+    history continues in the archive endpoint. ``last_read_id`` is the newest
+    message sent by the current user that the other user has read.
     """
     try:
         other_user = get_object_or_404(User, id=user_id)
+        since_id, before_id, limit = _history_params(request)
         
-        messages = ChatMessage.objects.filter(
-            Q(sender=request.user, receiver=other_user) |
-            Q(sender=other_user, receiver=request.user)
-        ).select_related('sender', 'receiver').order_by('timestamp')
+        conversation = Conversation.between(request.user, other_user)
+        if conversation is None:
+            return JsonResponse({'success': True, 'messages': [], 'has_more': False,
+                                 'more_in_archive': False, 'last_read_id': None})
+        messages = conversation.messages.all()
         
-        # Mark messages as read
-        messages.filter(receiver=request.user, is_read=False).update(is_read=True)
+        # Mark messages as read and tell the sender how far they have been read
+        marked = conversation.mark_read(request.user)
+        if marked:
+            invalidate_unread(request.user.id)
+            read_up_to = messages.filter(sender=other_user).aggregate(last=Max('id'))['last']
+            publish_to_user(other_user.id, 'chat_read', {'reader_id': request.user.id, 'last_read_id': read_up_to})
         
-        messages_data = []
-        for msg in messages:
-            messages_data.append({
-                'id': msg.id,
-                'sender': msg.sender.username,
-                'receiver': msg.receiver.username,
-                'message': msg.message,
-                'timestamp': msg.timestamp.isoformat(),
-                'is_read': msg.is_read,
-                'is_sender': msg.sender == request.user,
-            })
+        page, has_more = _message_page(messages, since_id, before_id, limit)
+        more_in_archive = since_id is None and not has_more and conversation.archived_messages.exists()
+        
+        last_read_id = messages.filter(sender=request.user, is_read=True).aggregate(last=Max('id'))['last']
         
-        return JsonResponse({'success': True, 'messages': messages_data})
+        return JsonResponse({
+            'success': True,
+            'messages': [_serialize_message(msg, request.user) for msg in page],
+            'has_more': has_more,
+            'more_in_archive': more_in_archive,
+            'last_read_id': last_read_id,
+        })
     
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+@login_required
+def archived_messages_view(request, user_id):
+    """
+    Page backwards through archived messages with another user (AJAX)
+    
+    Returns up to ``limit`` archived messages older than ``before_id``, oldest
+    first, with ``has_more`` telling whether older pages exist.
+    """
+    try:
+        other_user = get_object_or_404(User, id=user_id)
+        before_id = _int_param(request.GET.get('before_id'))
+        limit = _int_param(request.GET.get('limit')) or settings.CHAT_HISTORY_PAGE_SIZE
+        limit = max(1, min(limit, settings.CHAT_HISTORY_MAX_PAGE_SIZE))
+        
+        conversation = Conversation.between(request.user, other_user)
+        if conversation is None:
+            return JsonResponse({'success': True, 'messages': [], 'has_more': False})
+        
+        archived = ArchivedChatMessage.objects.filter(conversation=conversation)
+        if before_id is not None:
+            archived = archived.filter(id__lt=before_id)
+        page = list(archived.select_related('sender', 'receiver').order_by('-id')[:limit + 1])
+        has_more = len(page) > limit
+        
+        return JsonResponse({
+            'success': True,
+            'messages': [_serialize_message(msg, request.user) for msg in page[:limit][::-1]],
+            'has_more': has_more,
+        })
+    
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+def unread_count_view(request):
+    """
+    Unread chat message count for the navigation badge (AJAX)
+    """
+    return JsonResponse({'success': True, 'unread': get_unread_count(request.user)})
+
+
+@login_required
+def user_search_view(request):
+    """
+    Typeahead search for chat recipients (AJAX)
+    """
+    query = request.GET.get('q', '').strip()
+    users = search_users(query, request.user, limit=10) if query else []
+    online = online_user_ids(u.id for u in users)
+    
+    results = [{
+        'id': u.id,
+        'username': u.username,
+        'name': u.get_full_name() or u.username,
+        'department': u.profile.department,
+        'is_it_staff': u.profile.is_it_staff,
+        'online': u.id in online,
+    } for u in users]
+    
+    return JsonResponse({'success': True, 'users': results})
+
+
+@login_required
+def wait_messages_view(request, user_id):
+    """
+    Long-poll variant of get_messages_view for WSGI deployments (AJAX)
+    
+    Holds the request until a chat event is signalled for the current user or
+    CHAT_LONG_POLL_TIMEOUT expires, then answers like get_messages_view with
+    ``since_id``. Run gunicorn with gevent workers so waiting clients do not
+    each occupy a worker.
+    """
+    since_id = _int_param(request.GET.get('since_id'))
+    if since_id is None:
+        return get_messages_view(request, user_id)
+    
+    signal = get_chat_signal()
+    
+    # Take the signal version before checking so nothing slips in between
+    version = signal.version(request.user.id)
+    has_new = ChatMessage.objects.filter(
+        Q(sender=request.user, receiver_id=user_id) |
+        Q(sender_id=user_id, receiver=request.user),
+        id__gt=since_id,
+    ).exists()
+    
+    if not has_new:
+        # Don't hold a database connection open while the client waits
+        if not connection.in_atomic_block:
+            connection.close()
+        signal.wait(request.user.id, version, settings.CHAT_LONG_POLL_TIMEOUT)
+    
+    return get_messages_view(request, user_id)
+
+
+@login_required
+async def chat_stream_view(request):
+    """
+    Server-Sent Events stream pushing chat events to the current user
+    """
+    if not isinstance(request, ASGIRequest):
+        # Streaming needs the ASGI entry point; 204 tells EventSource to stop
+        # reconnecting so the client falls back to polling
+        return HttpResponse(status=204)
+    
+    user = await request.auser()
+    subscription = get_broker().subscribe(user_channel(user.id))
+    keepalive = getattr(settings, 'CHAT_STREAM_KEEPALIVE', 20)
+    # Events published by other worker processes never reach this process's
+    # broker; they only bump the user's file signal, which is checked between
+    # events. Notifications from this process were delivered by the broker
+    # already. The client answers chat_resync with a delta fetch.
+    signal = get_chat_signal()
+    position = await asyncio.to_thread(signal.position, user.id)
+    
+    async def event_stream():
+        nonlocal position
+        idle = 0
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                payload = await subscription.get(timeout=signal.interval)
+                if payload is not None:
+                    idle = 0
+                    yield f"event: {payload['type']}\ndata: {json.dumps(payload['data'])}\n\n"
+                    continue
+                # File access stays off the event loop
+                elsewhere, position = await asyncio.to_thread(signal.notified_elsewhere, user.id, position)
+                if elsewhere:
+                    idle = 0
+                    yield 'event: chat_resync\ndata: {}\n\n'
+                    continue
+                idle += signal.interval
+                if idle >= keepalive:
+                    # Comment line keeps proxies from closing an idle stream
+                    idle = 0
+                    yield ': keepalive\n\n'
+        finally:
+            subscription.close()
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def toggle_dark_mode_view(request):
     """
@@ -892,7 +1169,8 @@ def toggle_dark_mode_view(request):
         try:
             profile = request.user.profile
             profile.dark_mode = not profile.dark_mode
-            profile.save()
+            # The profile may come from the cache, so leave other fields alone
+            profile.save(update_fields=['dark_mode'])
             
             return JsonResponse({
                 'success': True,
@@ -904,38 +1182,35 @@ def toggle_dark_mode_view(request):
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
 
-@login_required
-def analytics_view(request):
-    """
-    Analytics dashboard (IT staff only)
-    """
-    if not request.user.profile.is_it_staff:
-        messages.error(request, 'You do not have permission to view analytics.')
-        return redirect('tickets:dashboard')
-    
-    # Get analytics data
-    total_tickets = Ticket.objects.count()
-    open_tickets = Ticket.objects.filter(status='open').count()
-    in_progress_tickets = Ticket.objects.filter(status='in_progress').count()
-    resolved_tickets = Ticket.objects.filter(status='resolved').count()
-    closed_tickets = Ticket.objects.filter(status='closed').count()
-    escalated_tickets = Ticket.objects.filter(status='escalated').count()
-    
-    # Tickets by category
-    category_stats = Ticket.objects.values('category').annotate(count=Count('id')).order_by('-count')
-    
-    # Tickets by priority
-    priority_stats = Ticket.objects.values('priority').annotate(count=Count('id')).order_by('-count')
-    
-    # Tickets by status
-    status_stats = Ticket.objects.values('status').annotate(count=Count('id')).order_by('-count')
-    
-    # Recent activity (last 30 days)
+def _ticket_counts():
+    return {
+        'total_tickets': Ticket.objects.count(),
+        'open_tickets': Ticket.objects.filter(status='open').count(),
+        'in_progress_tickets': Ticket.objects.filter(status='in_progress').count(),
+        'resolved_tickets': Ticket.objects.filter(status='resolved').count(),
+        'closed_tickets': Ticket.objects.filter(status='closed').count(),
+        'escalated_tickets': Ticket.objects.filter(status='escalated').count(),
+    }
+
+
+def _ticket_breakdowns():
+    return {
+        'category_stats': list(Ticket.objects.values('category').annotate(count=Count('id')).order_by('-count')),
+        'priority_stats': list(Ticket.objects.values('priority').annotate(count=Count('id')).order_by('-count')),
+        'status_stats': list(Ticket.objects.values('status').annotate(count=Count('id')).order_by('-count')),
+    }
+
+
+def _recent_ticket_activity():
+    # Last 30 days
     thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_tickets = Ticket.objects.filter(created_at__gte=thirty_days_ago).count()
-    recent_resolved = Ticket.objects.filter(resolved_at__gte=thirty_days_ago).count()
-    
-    # Average resolution time
+    return {
+        'recent_tickets': Ticket.objects.filter(created_at__gte=thirty_days_ago).count(),
+        'recent_resolved': Ticket.objects.filter(resolved_at__gte=thirty_days_ago).count(),
+    }
+
+
+def _average_resolution_time():
     resolved_tickets_with_time = Ticket.objects.filter(
         resolved_at__isnull=False,
         created_at__isnull=False
@@ -949,20 +1224,32 @@ def analytics_view(request):
         avg_resolution_hours = total_time / (resolved_tickets_with_time.count() * 3600)
     else:
         avg_resolution_hours = 0
+    return {'avg_resolution_hours': round(avg_resolution_hours, 2)}
+
+
+# Independent parts of the analytics page; the async view loads them concurrently
+ANALYTICS_SECTIONS = (_ticket_counts, _ticket_breakdowns, _recent_ticket_activity, _average_resolution_time)
+
+
+def _ticket_analytics():
+    """
+    Ticket counts and resolution times for the analytics page
+    """
+    context = {}
+    for section in ANALYTICS_SECTIONS:
+        context.update(section())
+    return context
+
+
+@login_required
+def analytics_view(request):
+    """
+    Analytics dashboard (IT staff only)
+    """
+    if not request.user.profile.is_it_staff:
+        messages.error(request, 'You do not have permission to view analytics.')
+        return redirect('tickets:dashboard')
     
-    context = {
-        'total_tickets': total_tickets,
-        'open_tickets': open_tickets,
-        'in_progress_tickets': in_progress_tickets,
-        'resolved_tickets': resolved_tickets,
-        'closed_tickets': closed_tickets,
-        'escalated_tickets': escalated_tickets,
-        'category_stats': category_stats,
-        'priority_stats': priority_stats,
-        'status_stats': status_stats,
-        'recent_tickets': recent_tickets,
-        'recent_resolved': recent_resolved,
-        'avg_resolution_hours': round(avg_resolution_hours, 2),
-    }
+    context = caching.get_or_set('analytics', ('overview',), _ticket_analytics)
     
     return render(request, 'tickets/analytics.html', context)
@@ -0,0 +1,77 @@
+"""
+Streaming ZIP archives.
+
+zipfile can write to a stream it cannot seek: each member's sizes and CRC go
+in a data descriptor after its data, so nothing has to be rewritten later.
+The archive is written into a sink that just collects bytes, and the
+generator hands them to the response after every block. Memory use stays at
+one block regardless of how large the archive gets.
+"""
+
+import os
+import zipfile
+
+COPY_BLOCK_SIZE = 64 * 1024
+
+# Already-compressed formats are stored as-is rather than deflated again
+STORED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.zip', '.rar', '.docx', '.webp'}
+
+
+class _ZipSink:
+    """
+    Write-only file object that buffers what zipfile writes until it is drained
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def unique_arcname(name, used):
+    """
+    Return ``name``, or ``name (2)``, ``name (3)``... if already taken in the archive
+    """
+    base, ext = os.path.splitext(name)
+    candidate = name
+    counter = 2
+    while candidate in used:
+        candidate = f'{base} ({counter}){ext}'
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+def stream_zip(entries):
+    """
+    Yield a ZIP archive of ``entries``, given as ``(arcname, source, size, date_time)``
+
+    ``source`` is a path, or a callable returning an open binary file.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for arcname, source, size, date_time in entries:
+            info = zipfile.ZipInfo(arcname, date_time=date_time)
+            info.file_size = size
+            if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            
+            opened = source() if callable(source) else open(source, 'rb')
+            with opened, archive.open(info, 'w') as member:
+                for block in iter(lambda: opened.read(COPY_BLOCK_SIZE), b''):
+                    member.write(block)
+                    yield from sink.drain()
+            yield from sink.drain()
+    # Central directory
+    yield from sink.drain()